@@ -1,3 +1,5 @@
+from starlette.concurrency import run_in_threadpool
+
 from services.assistant_service import (
     register_user,
     authenticate_user,
@@ -6,19 +8,19 @@ from services.assistant_service import (
 )
 
 
-def register_controller(username: str, email: str, password: str):
-    res = register_user(username, email, password)
+async def register_controller(username: str, email: str, password: str):
+    res = await register_user(username, email, password)
     if res is None:
         return {"error": "user_exists_or_conflict"}
     return {"id": res["id"], "username": res["username"], "email": res.get("email")}
 
 
-def login_controller(username: str, password: str):
-    u = authenticate_user(username, password)
+async def login_controller(username: str, password: str):
+    u = await authenticate_user(username, password)
     if u is None:
         return None
     access_token = create_access_token({"sub": u["username"], "id": u["id"]})
-    refresh_plain, _ = create_refresh_token(u["id"])  # store and return plain refresh token
+    refresh_plain, _ = await run_in_threadpool(create_refresh_token, u["id"])  # store and return plain refresh token
     greeting = f"Selamat datang, {u['username']}"
     return {
         "access_token": access_token,
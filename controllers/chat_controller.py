@@ -1,23 +1,30 @@
-from services.chat_service import handle_chat
+from starlette.concurrency import run_in_threadpool
+
+from services.chat_service import handle_chat, stream_chat
 from services.task_service import TaskService
 from schemas.task_schema import TaskCreate
+from utils.tracing import span
 
 task_service = TaskService()
 
-def chat_controller(current_user, message: str):
-    result = handle_chat(current_user, message)
+
+def _to_task_create(task_data) -> TaskCreate:
+    return TaskCreate(
+        title=task_data["title"],
+        description=task_data["description"],
+        due_date=task_data["due_date"]
+    )
+
+
+async def chat_controller(current_user, message: str):
+    result = await handle_chat(current_user, message)
 
     # 🔥 JIKA CHAT MENGHASILKAN TASK
     if result.get("type") == "create_task":
         task_data = result["task"]
 
-        task = TaskCreate(
-            title=task_data["title"],
-            description=task_data["description"],
-            due_date=task_data["due_date"]
-        )
-
-        task_service.create_task(task, current_user["id"])
+        with span("task_insert"):
+            await run_in_threadpool(task_service.create_task, _to_task_create(task_data), current_user["id"])
 
         return {
             "reply": result["reply"]
@@ -25,3 +32,12 @@ def chat_controller(current_user, message: str):
 
     # 🔥 CHAT NORMAL / AI
     return result
+
+
+async def stream_chat_controller(current_user, message: str):
+    """Forward ``stream_chat`` events, persisting an extracted task first."""
+    async for event in stream_chat(current_user, message):
+        if event.get("event") == "meta" and event.get("type") == "create_task":
+            with span("task_insert"):
+                await run_in_threadpool(task_service.create_task, _to_task_create(event["task"]), current_user["id"])
+        yield event
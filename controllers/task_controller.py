@@ -1,15 +1,121 @@
-from fastapi import APIRouter
-from services.task_service import TaskService
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from services.task_service import MAX_PAGE_SIZE, TaskService
 from schemas.task_schema import TaskCreate
+from services.assistant_service import get_current_user
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 task_service = TaskService()
 
+BULK_MAX_ITEMS = int(os.getenv("TASK_BULK_MAX_ITEMS", "10000"))
+BULK_MAX_LINE_BYTES = int(os.getenv("TASK_BULK_MAX_LINE_BYTES", "65536"))
+
 @router.post("/")
 def create_task(task: TaskCreate, user_id: int):
     return task_service.create_task(task, user_id)
 
+async def _ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    # split the body into lines as it arrives instead of buffering all of it
+    buf, lineno = b"", 0
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            lineno += 1
+            if len(line) > BULK_MAX_LINE_BYTES:
+                raise HTTPException(status_code=413, detail={"line": lineno, "error": f"line longer than {BULK_MAX_LINE_BYTES} bytes"})
+            yield lineno, line
+        # an unterminated line must not grow without bound either
+        if len(buf) > BULK_MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail={"line": lineno + 1, "error": f"line longer than {BULK_MAX_LINE_BYTES} bytes"})
+    if buf:
+        yield lineno + 1, buf
+
+
+async def _read_bulk(request: Request) -> List[TaskCreate]:
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = []
+        async for lineno, line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            if len(items) >= BULK_MAX_ITEMS:
+                raise HTTPException(status_code=413, detail=f"at most {BULK_MAX_ITEMS} tasks per request")
+            try:
+                items.append(TaskCreate(**json.loads(line)))
+            except Exception as e:
+                raise HTTPException(status_code=422, detail={"line": lineno, "error": str(e)})
+        return items
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    if len(body) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"at most {BULK_MAX_ITEMS} tasks per request")
+    items = []
+    for index, obj in enumerate(body):
+        try:
+            items.append(TaskCreate(**obj))
+        except Exception as e:
+            raise HTTPException(status_code=422, detail={"index": index, "error": str(e)})
+    return items
+
+
+@router.post("/bulk")
+async def create_tasks_bulk(request: Request, current_user: dict = Depends(get_current_user)):
+    """Import many tasks at once (JSON array, or NDJSON streamed line by line).
+
+    All-or-nothing: every item is validated before the single insert
+    transaction. Returns the new ids in input order.
+    """
+    tasks = await _read_bulk(request)
+    task_ids = await run_in_threadpool(task_service.create_tasks, tasks, current_user["id"])
+    return {"message": "Tasks created", "created": len(task_ids), "task_ids": task_ids}
+
+
 @router.get("/")
-def get_tasks():
-    return task_service.get_tasks()
+def get_tasks(
+    request: Request,
+    response: Response,
+    status: str = "all",
+    notified: Optional[bool] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user),
+):
+    user_id = current_user["id"]
+    # ETag = list version + query, so an unchanged list answers 304 without touching tasks
+    version = task_service.tasks_version(user_id)
+    query = hashlib.sha1(str(request.query_params).encode("utf-8")).hexdigest()[:12]
+    etag = f'W/"{user_id}-{version}-{query}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        page = task_service.get_tasks(
+            user_id,
+            status=status,
+            notified=notified,
+            due_from=due_from,
+            due_to=due_to,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etag
+    return page
@@ -1,17 +1,112 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from utils.ws_manager import manager
+import json
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from controllers.chat_controller import stream_chat_controller
+from services.assistant_service import get_current_user
+from models import outbox_model
+from utils.ws_manager import Connection, manager
 
 router = APIRouter()
 
+
+async def _handle_chat_message(conn: Connection, user_id: int, data: dict):
+    """Stream a chat reply over the socket.
+
+    Client sends ``{"type": "chat", "token": "<access token>", "message": "...",
+    "request_id": "..."}``; every streamed event is echoed back with the same
+    ``request_id`` and ``type`` set to ``chat_<event>``.
+    """
+    request_id = data.get("request_id")
+    try:
+        current_user = await run_in_threadpool(get_current_user, data.get("token") or "")
+    except HTTPException as e:
+        await conn.send_json({"type": "chat_error", "request_id": request_id, "detail": e.detail})
+        return
+    if current_user["id"] != user_id:
+        await conn.send_json({"type": "chat_error", "request_id": request_id, "detail": "user_mismatch"})
+        return
+
+    try:
+        async for event in stream_chat_controller(current_user, data.get("message") or ""):
+            body = {k: v for k, v in event.items() if k != "event"}
+            body["type"] = f"chat_{event['event']}"
+            body["request_id"] = request_id
+            await conn.send_json(body)
+    except Exception as e:
+        print("[WS CHAT ERROR]", e)
+        await conn.send_json({"type": "chat_error", "request_id": request_id, "detail": "chat_handler_error"})
+
+
+async def _replay_outbox(conn: Connection, user_id: int, last_seq: int):
+    """Ack everything up to the client's cursor, then replay the rest in order.
+
+    Items are sent straight to the socket (never through the bounded queue,
+    whose overflow policy could drop or disconnect), with the live sender
+    paused so nothing newer overtakes them: the client acks the highest seq
+    it saw, which compacts everything below it.
+    """
+    await asyncio.to_thread(outbox_model.ack, user_id, last_seq)
+    conn.replaying = True
+    try:
+        async with conn.send_lock:
+            while True:
+                conn.missed = False
+                items = await asyncio.to_thread(outbox_model.pending, user_id, last_seq)
+                for text in items:
+                    await conn.websocket.send_text(text)
+                if items:
+                    last_seq = json.loads(items[-1])["seq"]
+                # a full page, or live reminders that overflowed while we sent: read again
+                if len(items) < outbox_model.REPLAY_LIMIT and not conn.missed:
+                    break
+    finally:
+        conn.replaying = False
+
+
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
+async def websocket_endpoint(websocket: WebSocket, user_id: int, token: Optional[str] = None, last_seq: Optional[int] = None):
     """
-    ws://localhost:8000/ws?user_id=1
+    ws://localhost:8000/ws?user_id=1&token=<access token>&last_seq=41
+
+    The access token must belong to ``user_id``; otherwise the handshake is
+    rejected (close code 1008) before anything is replayed or acknowledged.
+
+    Reminders carry a per-user ``seq``. Clients that pass ``last_seq`` (their
+    last acknowledged reminder, 0 on first connect) get everything after it
+    replayed, and acknowledge with ``{"type": "ack", "seq": N}``. Replayed
+    and live reminders may overlap; ignore any ``seq`` already seen.
     """
-    await manager.connect(user_id, websocket)
+    try:
+        current_user = await run_in_threadpool(get_current_user, token or "")
+    except HTTPException:
+        current_user = None
+    if current_user is None or current_user["id"] != user_id:
+        await websocket.close(code=1008)
+        return
+
+    conn = await manager.connect(user_id, websocket)
 
     try:
+        if last_seq is not None:
+            await _replay_outbox(conn, user_id, last_seq)
+
         while True:
-            await websocket.receive_text()  # keep alive
+            text = await websocket.receive_text()  # keep alive / chat
+            try:
+                data = json.loads(text)
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            if data.get("type") == "chat":
+                await _handle_chat_message(conn, user_id, data)
+            elif data.get("type") == "ack" and isinstance(data.get("seq"), int):
+                await asyncio.to_thread(outbox_model.ack, user_id, data["seq"])
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        pass
+    finally:
+        manager.disconnect(conn)
@@ -1,22 +1,31 @@
 from dotenv import load_dotenv
 load_dotenv()  # 🔥 WAJIB, PALING ATAS
 
-import os
+import time
+import random
 import asyncio
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from routes import assistant as assistant_router
 from routes import chat as chat_router
+from routes import metrics as metrics_router
+from routes import profiler as profiler_router
 from controllers import ws_controller
 from controllers import task_controller
 
-from scheduler.reminder_worker import task_reminder_worker
+from scheduler.reminder_worker import ReminderScheduler, send_reminders, task_reminder_worker
+from scheduler.token_janitor import token_janitor
 from controllers.task_controller import task_service
-from models.users_model import _ensure_db
-
-print("OPENROUTER_API_KEY loaded:", bool(os.getenv("OPENROUTER_API_KEY")))
-print("OPENROUTER_MODEL:", os.getenv("OPENROUTER_MODEL"))
+from models import db
+from services.llm_client import llm_client
+from services.password_hasher import password_hasher
+from services.warmup import warm_up
+from utils.ws_manager import Connection, manager
+from utils.pubsub import create_bus
+from utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS
+from utils import tracing
+from utils.profiler import profiler
 
 app = FastAPI(title="AI Assistant Service")
 
@@ -28,11 +37,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template ("/tasks/{id}"), not the raw path, to keep series bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(request.method, path).observe(time.perf_counter() - t0)
+        HTTP_REQUESTS.labels(request.method, path, status).inc()
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    if not tracing.SERVER_TIMING and not tracing.TRACE_SAMPLE_RATE:
+        return await call_next(request)
+    trace = tracing.start_trace(request.method, request.url.path)
+    response = await call_next(request)
+    # streamed bodies: the header covers what ran before the first byte
+    if tracing.SERVER_TIMING:
+        response.headers["Server-Timing"] = trace.header()
+    if trace.sampled:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        response.body_iterator = tracing.write_after_body(response.body_iterator, trace, route, response.status_code)
+    return response
+
+
+async def profile_requests(request: Request, call_next):
+    if random.random() >= profiler.sample_rate:
+        return await call_next(request)
+    # the sampler thread runs while at least one picked request is in flight
+    profiler.request_started()
+    try:
+        return await call_next(request)
+    finally:
+        profiler.request_finished()
+
+
+# only installed when request sampling is configured; windows (/debug/profiler/start) don't need it
+if profiler.sample_rate > 0:
+    app.middleware("http")(profile_requests)
+
 # ROUTERS
 app.include_router(assistant_router.router)
 app.include_router(task_controller.router)
 app.include_router(ws_controller.router)
 app.include_router(chat_router.router)
+app.include_router(metrics_router.router)
+app.include_router(profiler_router.router)
 
 @app.get("/")
 def root():
@@ -41,9 +99,31 @@ def root():
 @app.on_event("startup")
 async def start_scheduler():
     print("[STARTUP] Initializing database...")
-    _ensure_db()
+    db.init_db()
+
+    # profiler attribution: every endpoint plus the long-running tasks started here
+    profiler.label_routes(app.routes)
+    profiler.label(ReminderScheduler.run, "task:reminder_scheduler")
+    profiler.label(ReminderScheduler._deliver, "task:reminder_scheduler")
+    profiler.label(send_reminders, "task:reminder_scheduler")
+    profiler.label(token_janitor, "task:token_janitor")
+    profiler.label(Connection._run, "task:ws_sender")
+
+    print("[STARTUP] OpenRouter key loaded:", bool(llm_client.api_key()), "| model:", llm_client.model())
+    await warm_up()
+
+    await manager.start_pubsub(create_bus())
 
     print("[STARTUP] Starting reminder scheduler...")
     asyncio.create_task(
         task_reminder_worker(task_service)
     )
+    asyncio.create_task(token_janitor())
+
+
+@app.on_event("shutdown")
+async def close_resources():
+    await manager.stop_pubsub()
+    await llm_client.aclose()
+    password_hasher.shutdown()
+    db.close_pool()
@@ -1,3 +1,3 @@
 """Models package init."""
 
-__all__ = ["users_model"]
+__all__ = ["db", "users_model"]
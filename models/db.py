@@ -0,0 +1,153 @@
+"""Shared SQLite access layer.
+
+Every module talks to ``users.db`` through one thread-safe connection pool.
+Pragmas are applied once per connection when it is opened and schema
+migrations (``models.migrations``) run once per process, so the request path
+never runs DDL.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from models import migrations
+
+DB_DIR = os.path.dirname(__file__)
+DB_PATH = os.getenv("ASSISTANT_DB_PATH") or os.path.join(DB_DIR, "users.db")
+POOL_SIZE = int(os.getenv("ASSISTANT_DB_POOL_SIZE", "8"))
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared between threads.
+
+    Connections are opened lazily up to ``size``; once the pool is exhausted
+    callers block until a connection is released.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, timeout: float = 5.0):
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("connection pool exhausted")
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+        with self._lock:
+            self._opened = 0
+
+
+_pool: ConnectionPool = None
+_pool_lock = threading.Lock()
+_initialized = False
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def init_db():
+    """Migrate the schema once per process. Safe to call repeatedly."""
+    global _initialized
+    if _initialized:
+        return
+    with _pool_lock:
+        if _initialized:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        try:
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            migrations.migrate(conn)
+        finally:
+            conn.close()
+        _initialized = True
+
+
+def configure(path: str, pool_size: int = POOL_SIZE):
+    """Point the access layer at another database file (scripts/benchmarks)."""
+    global DB_PATH, _pool, _initialized
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        DB_PATH = path
+        _pool = ConnectionPool(path, pool_size)
+        _initialized = False
+    init_db()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection. Uncommitted work is rolled back on release."""
+    if not _initialized:
+        init_db()
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
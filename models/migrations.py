@@ -0,0 +1,231 @@
+"""Versioned schema migrations for ``users.db``.
+
+The current version lives in ``PRAGMA user_version``. ``migrate`` applies
+every pending migration in order, each inside its own ``BEGIN IMMEDIATE``
+transaction, so existing databases are upgraded in place and concurrent
+workers starting at the same time do not race each other.
+
+To change the schema, append a new ``(version, description, statements)``
+entry to ``MIGRATIONS`` -- never edit one that has already shipped.
+"""
+import sqlite3
+from typing import Dict, List, Tuple
+
+BASE_SCHEMA = (
+    # users
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        email TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        salt TEXT NOT NULL
+    )
+    """,
+    # revoked JWT
+    """
+    CREATE TABLE IF NOT EXISTS revoked_tokens (
+        jti TEXT PRIMARY KEY,
+        expires_at INTEGER
+    )
+    """,
+    # refresh tokens
+    """
+    CREATE TABLE IF NOT EXISTS refresh_tokens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        token_hash TEXT NOT NULL UNIQUE,
+        issued_at INTEGER,
+        expires_at INTEGER,
+        revoked INTEGER DEFAULT 0,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    # tasks
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        due_date INTEGER NOT NULL,
+        is_completed INTEGER DEFAULT 0,
+        is_notified INTEGER DEFAULT 0,
+        created_at INTEGER NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+)
+
+MIGRATIONS: List[Tuple[int, str, Tuple[str, ...]]] = [
+    (1, "base schema", BASE_SCHEMA),
+    (
+        2,
+        "hot-path indexes",
+        (
+            # partial index: only rows the reminder scheduler still cares about
+            """
+            CREATE INDEX IF NOT EXISTS idx_tasks_pending_due
+            ON tasks (due_date)
+            WHERE is_completed = 0 AND is_notified = 0
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens (user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires_at)",
+            "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at)",
+        ),
+    ),
+    (
+        3,
+        "reminder leases",
+        (
+            "ALTER TABLE tasks ADD COLUMN lease_owner TEXT",
+            "ALTER TABLE tasks ADD COLUMN lease_expires INTEGER",
+        ),
+    ),
+    (
+        4,
+        "websocket pub/sub channel",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS ws_bus (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_ws_bus_created ON ws_bus (created_at)",
+        ),
+    ),
+    (
+        5,
+        "reminder outbox",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS outbox_cursors (
+                user_id INTEGER PRIMARY KEY,
+                next_seq INTEGER NOT NULL,
+                acked_seq INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS reminder_outbox (
+                user_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                PRIMARY KEY (user_id, seq)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_reminder_outbox_created ON reminder_outbox (created_at)",
+        ),
+    ),
+    (
+        6,
+        "per-user task listing index",
+        ("CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks (user_id, due_date, id)",),
+    ),
+    (
+        7,
+        "per-user task list versions",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS task_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """,
+        ),
+    ),
+    (
+        8,
+        "monotonic revocation ids",
+        (
+            # AUTOINCREMENT ids are never reused, so workers can sync revocations by "id > last seen"
+            """
+            CREATE TABLE revoked_tokens_v8 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                jti TEXT NOT NULL UNIQUE,
+                expires_at INTEGER
+            )
+            """,
+            "INSERT INTO revoked_tokens_v8 (jti, expires_at) SELECT jti, expires_at FROM revoked_tokens ORDER BY rowid",
+            "DROP TABLE revoked_tokens",
+            "ALTER TABLE revoked_tokens_v8 RENAME TO revoked_tokens",
+            "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at)",
+        ),
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# queries on the request/scheduler hot path that must be served by an index
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "find_user": ("SELECT id, username, email, password_hash, salt FROM users WHERE username = ?", ("u",)),
+    "find_user_by_id": ("SELECT id, username, email, password_hash, salt FROM users WHERE id = ?", (1,)),
+    "sync_revocations": ("SELECT id, jti, expires_at FROM revoked_tokens WHERE id > ? ORDER BY id", (0,)),
+    "purge_revoked_tokens": ("SELECT rowid FROM revoked_tokens WHERE expires_at < ? LIMIT ?", (0, 500)),
+    "purge_refresh_tokens": ("SELECT rowid FROM refresh_tokens WHERE expires_at < ? LIMIT ?", (0, 500)),
+    "find_refresh_token": ("SELECT id, user_id, token_hash, issued_at, expires_at, revoked FROM refresh_tokens WHERE token_hash = ?", ("h",)),
+    "revoke_all_refresh_tokens_for_user": ("UPDATE refresh_tokens SET revoked = 1 WHERE user_id = ?", (1,)),
+    "upcoming_tasks": (
+        "SELECT id, title, description, due_date FROM tasks WHERE user_id = ? AND is_completed = 0 AND due_date >= ? ORDER BY due_date LIMIT ?",
+        (1, 0, 5),
+    ),
+    "list_tasks": (
+        "SELECT id, title, due_date FROM tasks WHERE user_id = ? AND (due_date, id) > (?, ?) AND is_completed = 0 "
+        "AND due_date >= ? AND due_date <= ? ORDER BY due_date, id LIMIT ?",
+        (1, 0, 0, 0, 0, 51),
+    ),
+    "task_list_version": ("SELECT version FROM task_versions WHERE user_id = ?", (1,)),
+    "pending_due_dates": (
+        "SELECT id, MAX(due_date, COALESCE(lease_expires + 1, 0)) AS due_at FROM tasks WHERE is_completed = 0 AND is_notified = 0 AND due_date <= ?",
+        (0,),
+    ),
+    "claim_due_tasks": (
+        "UPDATE tasks SET lease_owner = ?, lease_expires = ? WHERE id IN ("
+        "SELECT id FROM tasks WHERE is_completed = 0 AND is_notified = 0 AND due_date <= ? "
+        "AND (lease_expires IS NULL OR lease_expires < ?) ORDER BY due_date LIMIT ?) "
+        "RETURNING id, user_id, title, description, due_date",
+        ("w", 0, 0, 0, -1),
+    ),
+    "outbox_pending": ("SELECT payload FROM reminder_outbox WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?", (1, 0, 10)),
+    "outbox_ack": ("DELETE FROM reminder_outbox WHERE user_id = ? AND seq <= ?", (1, 0)),
+    "ack_tasks": ("UPDATE tasks SET is_notified = 1, lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?", (1, "w")),
+}
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version."""
+    for version, description, statements in MIGRATIONS:
+        if current_version(conn) >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # another process may have migrated while we waited for the lock
+            if current_version(conn) >= version:
+                conn.rollback()
+                continue
+            for stmt in statements:
+                conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"[DB] migrated to v{version}: {description}")
+    return current_version(conn)
+
+
+def table_scans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Return ``{query_name: plan_lines}`` for hot queries that scan a table."""
+    offenders = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        if any(line.startswith("SCAN") for line in plan):
+            offenders[name] = plan
+    return offenders
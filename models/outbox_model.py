@@ -0,0 +1,62 @@
+"""Durable per-user reminder outbox.
+
+Every reminder gets a per-user, monotonically increasing ``seq`` and is
+kept in ``reminder_outbox`` until the client acknowledges it. Sequence
+numbers come from ``outbox_cursors.next_seq`` so they never go backwards,
+even after acknowledged rows are compacted away.
+"""
+import json
+import sqlite3
+import time
+from typing import Dict, List
+
+from models import db
+
+REPLAY_LIMIT = 500
+
+
+def append(conn: sqlite3.Connection, user_id: int, payload: Dict) -> int:
+    """Append inside the caller's transaction; returns the assigned seq."""
+    conn.execute(
+        """
+        INSERT INTO outbox_cursors (user_id, next_seq, acked_seq) VALUES (?, 1, 0)
+        ON CONFLICT(user_id) DO UPDATE SET next_seq = next_seq + 1
+        """,
+        (user_id,),
+    )
+    seq = conn.execute("SELECT next_seq FROM outbox_cursors WHERE user_id = ?", (user_id,)).fetchone()[0]
+    conn.execute(
+        "INSERT INTO reminder_outbox (user_id, seq, payload, created_at) VALUES (?, ?, ?, ?)",
+        (user_id, seq, json.dumps(dict(payload, seq=seq), default=str), int(time.time())),
+    )
+    return seq
+
+
+def pending(user_id: int, after_seq: int, limit: int = REPLAY_LIMIT) -> List[str]:
+    """Serialized reminders with ``seq > after_seq``, oldest first."""
+    with db.connection() as conn:
+        rows = conn.execute(
+            "SELECT payload FROM reminder_outbox WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (user_id, after_seq, limit),
+        ).fetchall()
+        return [r["payload"] for r in rows]
+
+
+def ack(user_id: int, seq: int) -> int:
+    """Advance the user's cursor to ``seq`` and compact everything up to it."""
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE outbox_cursors SET acked_seq = MAX(acked_seq, ?) WHERE user_id = ?",
+            (seq, user_id),
+        )
+        cur = conn.execute("DELETE FROM reminder_outbox WHERE user_id = ? AND seq <= ?", (user_id, seq))
+        conn.commit()
+        return cur.rowcount
+
+
+def purge_older_than(cutoff_ts: int) -> int:
+    """Drop never-acknowledged items older than ``cutoff_ts``."""
+    with db.connection() as conn:
+        cur = conn.execute("DELETE FROM reminder_outbox WHERE created_at < ?", (cutoff_ts,))
+        conn.commit()
+        return cur.rowcount
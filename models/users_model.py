@@ -1,103 +1,88 @@
 import os
 import sqlite3
+import threading
+import time
 from typing import Optional, Dict
 
-DB_DIR = os.path.dirname(__file__)
-DB_PATH = os.path.join(DB_DIR, "users.db")
+from models import db
+from utils.cache import TTLCache
+from utils.metrics import DB_QUERY_SECONDS, timed
 
+# authenticated principals, keyed by "u:<username>" and "i:<id>"; entries are
+# dropped on logout/user changes here and otherwise expire after the TTL
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "60")),
+)
 
-def _get_conn():
-    conn = sqlite3.connect(DB_PATH, timeout=5)
-    conn.row_factory = sqlite3.Row
-    return conn
+PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "500"))
+
+# jti -> expires_at of every unexpired revocation, so the common "not revoked"
+# answer never touches SQLite. Revocations made by other workers are merged
+# in by sync_revocations() (scheduler/token_janitor.py runs it every
+# REVOCATION_SYNC_SECONDS), reading only rows newer than the last seen id.
+_revoked: Dict[str, Optional[int]] = {}
+_revoked_lock = threading.Lock()
+_revoked_loaded = False
+_revoked_last_id = 0
 
 
 def _ensure_db():
-    if not os.path.exists(DB_DIR):
-        os.makedirs(DB_DIR, exist_ok=True)
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
+    """Create the schema (once per process). Kept for existing callers."""
+    db.init_db()
 
-        # users
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                email TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                salt TEXT NOT NULL
-            )
-            """
-        )
-
-        # revoked JWT
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS revoked_tokens (
-                jti TEXT PRIMARY KEY,
-                expires_at INTEGER
-            )
-            """
-        )
-
-        # refresh tokens
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS refresh_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                token_hash TEXT NOT NULL UNIQUE,
-                issued_at INTEGER,
-                expires_at INTEGER,
-                revoked INTEGER DEFAULT 0,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """
-        )
-
-        # TASKS (⬅️ TAMBAHKAN INI)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                due_date INTEGER NOT NULL,
-                is_completed INTEGER DEFAULT 0,
-                is_notified INTEGER DEFAULT 0,
-                created_at INTEGER NOT NULL,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-            """
-        )
-
-        conn.commit()
-    finally:
-        conn.close()
 
+def _user_row(row) -> Dict:
+    return {"id": row["id"], "username": row["username"], "email": row["email"], "password_hash": row["password_hash"], "salt": row["salt"]}
 
 
+@timed(DB_QUERY_SECONDS, "users.find_user")
 def find_user(username: str) -> Optional[Dict]:
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT id, username, email, password_hash, salt FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
+    with db.connection() as conn:
+        row = conn.execute("SELECT id, username, email, password_hash, salt FROM users WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return None
+        return _user_row(row)
+
+
+@timed(DB_QUERY_SECONDS, "users.find_user_by_id")
+def find_user_by_id(user_id: int) -> Optional[Dict]:
+    with db.connection() as conn:
+        row = conn.execute("SELECT id, username, email, password_hash, salt FROM users WHERE id = ?", (user_id,)).fetchone()
         if row is None:
             return None
-        return {"id": row["id"], "username": row["username"], "email": row["email"], "password_hash": row["password_hash"], "salt": row["salt"]}
-    finally:
-        conn.close()
+        return _user_row(row)
 
 
+def get_principal(username: str) -> Optional[Dict]:
+    """``find_user`` behind the principal cache (used on every authenticated request)."""
+    user = principal_cache.get(f"u:{username}")
+    if user is None:
+        user = find_user(username)
+        if user is None:
+            return None
+        principal_cache.set(f"u:{username}", user)
+        principal_cache.set(f"i:{user['id']}", user)
+    return dict(user)
+
+
+def invalidate_principal(username: Optional[str] = None, user_id: Optional[int] = None):
+    """Drop a cached principal (both keys) after logout or a user change."""
+    keys = []
+    if username is not None:
+        keys.append(f"u:{username}")
+    if user_id is not None:
+        keys.append(f"i:{user_id}")
+    for key in keys:
+        user = principal_cache.pop(key)
+        if user is not None:
+            principal_cache.pop(f"u:{user['username']}")
+            principal_cache.pop(f"i:{user['id']}")
+
+
+@timed(DB_QUERY_SECONDS, "users.add_user")
 def add_user(username: str, email: str, password_hash: str, salt: str) -> Optional[Dict]:
-    _ensure_db()
-    conn = _get_conn()
-    try:
+    with db.connection() as conn:
         cur = conn.cursor()
         try:
             cur.execute(
@@ -108,57 +93,88 @@ def add_user(username: str, email: str, password_hash: str, salt: str) -> Option
         except sqlite3.IntegrityError:
             return None
         uid = cur.lastrowid
+        invalidate_principal(username=username, user_id=uid)
         return {"id": uid, "username": username, "email": email}
-    finally:
-        conn.close()
 
 
+@timed(DB_QUERY_SECONDS, "users.update_password_hash")
+def update_password_hash(user_id: int, password_hash: str) -> bool:
+    with db.connection() as conn:
+        cur = conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id))
+        conn.commit()
+    invalidate_principal(user_id=user_id)
+    return cur.rowcount > 0
+
+
+@timed(DB_QUERY_SECONDS, "users.revoke_token")
 def revoke_token(jti: str, expires_at: int) -> bool:
     """Store a revoked token JTI with its expiry timestamp."""
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
+    with db.connection() as conn:
         try:
-            cur.execute("INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, expires_at))
+            conn.execute("INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)", (jti, expires_at))
             conn.commit()
-            return True
         except Exception:
             return False
-    finally:
-        conn.close()
+    with _revoked_lock:
+        _revoked[jti] = expires_at
+    return True
+
+
+@timed(DB_QUERY_SECONDS, "users.sync_revocations")
+def sync_revocations() -> int:
+    """Merge revocations added since the last sync into the in-memory set and drop expired entries."""
+    global _revoked_loaded, _revoked_last_id
+    now = int(time.time())
+    with db.connection() as conn:
+        rows = conn.execute(
+            "SELECT id, jti, expires_at FROM revoked_tokens WHERE id > ? ORDER BY id", (_revoked_last_id,)
+        ).fetchall()
+    with _revoked_lock:
+        for row in rows:
+            if row["expires_at"] is None or row["expires_at"] >= now:
+                _revoked[row["jti"]] = row["expires_at"]
+        if rows:
+            _revoked_last_id = max(_revoked_last_id, rows[-1]["id"])
+        for jti in [j for j, exp in _revoked.items() if exp is not None and exp < now]:
+            del _revoked[jti]
+        _revoked_loaded = True
+        return len(_revoked)
 
 
 def is_token_revoked(jti: str) -> bool:
-    """Return True if the given jti is in revoked_tokens (and not expired)."""
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("SELECT expires_at FROM revoked_tokens WHERE jti = ?", (jti,))
-        row = cur.fetchone()
-        if row is None:
-            return False
-        expires_at = row["expires_at"]
-        # if expired, remove it
-        import time
-
-        if expires_at is not None and expires_at < int(time.time()):
-            try:
-                cur.execute("DELETE FROM revoked_tokens WHERE jti = ?", (jti,))
+    """Return True if the given jti is revoked (and not expired)."""
+    if not _revoked_loaded:
+        sync_revocations()
+    expires_at = _revoked.get(jti, 0)  # unknown jti reads as long expired
+    return expires_at is None or expires_at >= int(time.time())
+
+
+@timed(DB_QUERY_SECONDS, "users.purge_expired_tokens")
+def purge_expired_tokens(batch_size: int = PURGE_BATCH_SIZE) -> Dict[str, int]:
+    """Delete expired rows from revoked_tokens and refresh_tokens.
+
+    Works in batches of ``batch_size`` rows, one short transaction each, so
+    other writers are never locked out for long.
+    """
+    now = int(time.time())
+    deleted = {"revoked_tokens": 0, "refresh_tokens": 0}
+    for table in deleted:
+        while True:
+            with db.connection() as conn:
+                cur = conn.execute(
+                    f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE expires_at < ? LIMIT ?)",
+                    (now, batch_size),
+                )
                 conn.commit()
-            except Exception:
-                pass
-            return False
-        return True
-    finally:
-        conn.close()
+            deleted[table] += cur.rowcount
+            if cur.rowcount < batch_size:
+                break
+    return deleted
 
 
+@timed(DB_QUERY_SECONDS, "users.store_refresh_token")
 def store_refresh_token(user_id: int, token_hash: str, issued_at: int, expires_at: int) -> Optional[Dict]:
-    _ensure_db()
-    conn = _get_conn()
-    try:
+    with db.connection() as conn:
         cur = conn.cursor()
         try:
             cur.execute(
@@ -170,46 +186,31 @@ def store_refresh_token(user_id: int, token_hash: str, issued_at: int, expires_a
             return None
         rid = cur.lastrowid
         return {"id": rid, "user_id": user_id, "token_hash": token_hash, "issued_at": issued_at, "expires_at": expires_at}
-    finally:
-        conn.close()
 
 
+@timed(DB_QUERY_SECONDS, "users.find_refresh_token")
 def find_refresh_token(token_hash: str) -> Optional[Dict]:
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
+    with db.connection() as conn:
+        row = conn.execute(
             "SELECT id, user_id, token_hash, issued_at, expires_at, revoked FROM refresh_tokens WHERE token_hash = ?",
             (token_hash,),
-        )
-        row = cur.fetchone()
+        ).fetchone()
         if row is None:
             return None
         return {"id": row["id"], "user_id": row["user_id"], "token_hash": row["token_hash"], "issued_at": row["issued_at"], "expires_at": row["expires_at"], "revoked": bool(row["revoked"])}
-    finally:
-        conn.close()
 
 
+@timed(DB_QUERY_SECONDS, "users.revoke_refresh_token")
 def revoke_refresh_token(token_hash: str) -> bool:
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("UPDATE refresh_tokens SET revoked = 1 WHERE token_hash = ?", (token_hash,))
+    with db.connection() as conn:
+        cur = conn.execute("UPDATE refresh_tokens SET revoked = 1 WHERE token_hash = ?", (token_hash,))
         conn.commit()
         return cur.rowcount > 0
-    finally:
-        conn.close()
 
 
+@timed(DB_QUERY_SECONDS, "users.revoke_all_refresh_tokens_for_user")
 def revoke_all_refresh_tokens_for_user(user_id: int) -> int:
-    _ensure_db()
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("UPDATE refresh_tokens SET revoked = 1 WHERE user_id = ?", (user_id,))
+    with db.connection() as conn:
+        cur = conn.execute("UPDATE refresh_tokens SET revoked = 1 WHERE user_id = ?", (user_id,))
         conn.commit()
         return cur.rowcount
-    finally:
-        conn.close()
@@ -1,31 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional
 
 from controllers.auth_controller import register_controller, login_controller
 from services.assistant_service import get_current_user, refresh_access_token, revoke_refresh_token, oauth2_scheme, revoke_token
+from services.password_hasher import PasswordHasherBusy
+from services.tts_service import TTSUnavailable, tts_cache
 from fastapi import Response
-from fastapi.responses import StreamingResponse
-from io import BytesIO
-try:
-    from gtts import gTTS
-except Exception:
-    gTTS = None
+from fastapi.responses import FileResponse
 from schemas.schemas import UserCreate, UserLogin, UserResponse, TokenResponse, RefreshRequest
 
 router = APIRouter(prefix="/assistant", tags=["assistant"])
 
 
+def _hasher_busy():
+    return HTTPException(status_code=503, detail="auth_busy", headers={"Retry-After": "1"})
+
+
 @router.post("/register", response_model=UserResponse)
-def register_route(payload: UserCreate):
-    res = register_controller(payload.username, payload.email, payload.password)
+async def register_route(payload: UserCreate):
+    try:
+        res = await register_controller(payload.username, payload.email, payload.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if res is None or res.get("error"):
         raise HTTPException(status_code=400, detail=res.get("error", "register_failed"))
     return {"id": res["id"], "username": res["username"], "email": res.get("email")}
 
 
 @router.post("/login", response_model=TokenResponse)
-def login_route(payload: UserLogin):
-    res = login_controller(payload.username, payload.password)
+async def login_route(payload: UserLogin):
+    try:
+        res = await login_controller(payload.username, payload.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if res is None:
         raise HTTPException(status_code=401, detail="invalid_credentials")
     return res
@@ -63,13 +70,22 @@ def me_route(current_user: dict = Depends(get_current_user)):
 
 
 @router.get("/greeting/audio")
-def greeting_audio(current_user: dict = Depends(get_current_user)):
-    # return an MP3 audio stream saying the greeting (requires gTTS installed)
-    if gTTS is None:
-        raise HTTPException(status_code=501, detail="gTTS library not installed on server")
+def greeting_audio(request: Request, current_user: dict = Depends(get_current_user)):
+    # MP3 of the greeting, synthesized once per text and served from the disk cache
     text = f"Selamat datang, {current_user.get('username')}"
-    buf = BytesIO()
-    tts = gTTS(text=text, lang="id")
-    tts.write_to_fp(buf)
-    buf.seek(0)
-    return StreamingResponse(buf, media_type="audio/mpeg")
+    try:
+        path, key, st = tts_cache.acquire(text, lang="id")
+    except TTSUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400", "Accept-Ranges": "bytes"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range/If-Range itself (206 / 416)
+    return FileResponse(path, media_type="audio/mpeg", headers=headers, stat_result=st)
+
+
+@router.get("/greeting/audio/cache")
+def greeting_audio_cache(current_user: dict = Depends(get_current_user)):
+    return tts_cache.stats()
@@ -1,46 +1,73 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
-from controllers.chat_controller import chat_controller
+from fastapi.responses import StreamingResponse
+from controllers.chat_controller import chat_controller, stream_chat_controller
 from services.assistant_service import get_current_user
+from services.fast_path import local_responder
+from services.llm_cache import llm_cache
 from schemas.schemas import ChatMessage, ChatResponse
-from schemas.task_schema import TaskCreate
-from controllers.task_controller import task_service
-from datetime import datetime
+from utils.tracing import span
 
 router = APIRouter(prefix="/assistant/chat", tags=["chat"])
 
 
+def format_sse(event: dict) -> str:
+    data = {k: v for k, v in event.items() if k != "event"}
+    return f"event: {event.get('event', 'message')}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("/", response_model=ChatResponse)
-def chat_route(
+async def chat_route(
     payload: ChatMessage,
     current_user: dict = Depends(get_current_user),
 ):
     try:
-        res = chat_controller(current_user, payload.message)
-
-        # 🔔 JIKA CHAT MEMINTA REMINDER
-        if res.get("type") == "create_task":
-            task = res["task"]
-
-            task_service.create_task(
-                TaskCreate(
-                    title=task["title"],
-                    description=task["description"],
-                    due_date=datetime.fromisoformat(task["due_date"]),
-                ),
-                user_id=current_user["id"],
-            )
-
-            return {
-                "reply": res["reply"],
-                "action": None,
-            }
-
-        # 💬 CHAT BIASA
+        # 🔔 task dari chat sudah disimpan oleh chat_controller
+        with span("chat"):
+            res = await chat_controller(current_user, payload.message)
+
         return {
             "reply": res.get("reply"),
             "action": res.get("action"),
+            "actions": res.get("actions") or [],
         }
 
     except Exception as e:
         print("[CHAT ERROR]", e)
         raise HTTPException(status_code=500, detail="chat_handler_error")
+
+
+@router.post("/stream")
+async def chat_stream_route(
+    payload: ChatMessage,
+    current_user: dict = Depends(get_current_user),
+):
+    """Server-Sent Events: ``meta`` first, then ``delta`` chunks, then ``done``."""
+    async def event_source():
+        try:
+            # sent after the headers: only shows up in sampled traces (TRACE_SAMPLE_RATE)
+            with span("stream"):
+                async for event in stream_chat_controller(current_user, payload.message):
+                    yield format_sse(event)
+        except Exception as e:
+            print("[CHAT STREAM ERROR]", e)
+            yield format_sse({"event": "error", "detail": "chat_handler_error"})
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache")
+def chat_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Hit/miss counters of the LLM response cache."""
+    return llm_cache.stats()
+
+
+@router.get("/tiers")
+def chat_tier_stats(current_user: dict = Depends(get_current_user)):
+    """How many messages each tier (local handlers, llm, fallback) answered, and how fast."""
+    return local_responder.stats.snapshot()
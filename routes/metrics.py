@@ -0,0 +1,31 @@
+import os
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from services.fast_path import local_responder
+from utils.metrics import registry
+from utils.ws_manager import manager
+
+router = APIRouter(tags=["metrics"])
+
+# optional shared secret for scrapers: "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+registry.callback("ws_connections", "Open WebSocket connections on this worker", lambda: [((), manager.connection_count())])
+registry.callback("ws_connected_users", "Users with at least one open WebSocket on this worker", lambda: [((), len(manager.active_connections))])
+registry.callback(
+    "chat_tier_hits_total", "Chat messages answered per tier (local tiers, llm, fallback)",
+    lambda: [((name,), s["hits"]) for name, s in local_responder.stats.snapshot()["tiers"].items()],
+    type="counter", labelnames=("tier",),
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request):
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,55 @@
+import os
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from utils.profiler import profiler
+
+# the profiler endpoints only exist when an admin token is configured
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+
+
+def require_admin(request: Request):
+    if not PROFILER_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    auth = request.headers.get("authorization", "")
+    if not hmac.compare_digest(auth, f"Bearer {PROFILER_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/debug/profiler", tags=["debug"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/")
+def profiler_status():
+    return profiler.stats()
+
+
+@router.post("/start")
+def profiler_start(seconds: float = Query(30, gt=0, le=600)):
+    """Sample every thread for ``seconds`` (all requests, scheduler, WebSockets)."""
+    profiler.start_window(seconds)
+    return profiler.stats()
+
+
+@router.post("/stop")
+def profiler_stop():
+    profiler.stop()
+    return profiler.stats()
+
+
+@router.get("/collapsed", response_class=PlainTextResponse)
+def profiler_collapsed(route: Optional[str] = None, reset: bool = False):
+    """Collapsed stacks for flamegraph.pl / speedscope, optionally for one route label."""
+    text = profiler.collapsed(route)
+    if reset:
+        profiler.reset()
+    return PlainTextResponse(text)
+
+
+@router.delete("/")
+def profiler_reset():
+    profiler.reset()
+    return profiler.stats()
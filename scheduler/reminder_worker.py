@@ -1,27 +1,240 @@
+import os
+import time
+import heapq
 import asyncio
 from datetime import datetime
+from typing import List, Optional, Tuple
+
+from models import outbox_model
 from utils.ws_manager import manager
+from utils.metrics import REMINDER_LAG_SECONDS
+from services.task_service import LEASE_SECONDS, WORKER_ID, add_task_listener, remove_task_listener
+
+# how far ahead pending tasks are loaded into the heap; the DB is only
+# re-read when this window runs out (or a new task arrives, which is pushed)
+HORIZON_SECONDS = int(os.getenv("REMINDER_HORIZON_SECONDS", "3600"))
+SEND_CONCURRENCY = int(os.getenv("REMINDER_SEND_CONCURRENCY", "200"))
+SEND_TIMEOUT = float(os.getenv("REMINDER_SEND_TIMEOUT", "5"))
+OUTBOX_RETENTION_SECONDS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7")) * 24 * 3600
+# a batch whose outbox write failed is released and claimed again after this long
+DELIVER_RETRY_SECONDS = int(os.getenv("REMINDER_DELIVER_RETRY_SECONDS", "5"))
+# after a failed loop iteration (DB locked, disk full, ...): wait, then re-read the window
+ERROR_BACKOFF_SECONDS = float(os.getenv("REMINDER_ERROR_BACKOFF_SECONDS", "1"))
+MAX_ERROR_BACKOFF_SECONDS = float(os.getenv("REMINDER_MAX_ERROR_BACKOFF_SECONDS", "60"))
+
+
+class ReminderScheduler:
+    """Sleeps until the earliest pending due time instead of polling.
+
+    Keeps a min-heap of ``(due_ts, task_id, is_retry)`` for tasks due within
+    ``horizon`` seconds. ``TaskService.create_task`` pushes new tasks via
+    ``notify`` (thread-safe), waking the loop when the new task is earlier
+    than the current head.
+
+    Due tasks are leased to ``owner`` (see ``TaskService.claim_due_tasks``),
+    so any number of workers/nodes can run a scheduler against the same
+    database without sending a reminder twice. A task leased by another
+    worker is re-checked once its lease may have expired, which is how the
+    reminders of a crashed worker get picked up.
+    If writing a claimed batch to the outbox fails, its leases are released
+    and the tasks re-pushed ``DELIVER_RETRY_SECONDS`` later.
+
+    An iteration that raises is logged and retried after an exponential
+    backoff, with the heap rebuilt from the database, so a transient error
+    can't stop reminders for the rest of the process's life.
+    """
+
+    def __init__(self, task_service, horizon: int = HORIZON_SECONDS, owner: str = WORKER_ID, lease_seconds: int = LEASE_SECONDS):
+        self.task_service = task_service
+        self.horizon = horizon
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self._heap: List[Tuple[int, int, bool]] = []
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loaded_until = 0
+        self._arrived: Optional[List[Tuple[int, int, bool]]] = None
+        self._sending = set()
+
+    # --- producers -------------------------------------------------------
+
+    def notify(self, task_id: Optional[int], due_ts: int):
+        """Called after a task insert (``task_id=None``: bulk insert); safe from any thread."""
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._push, due_ts, task_id)
+
+    def _push(self, due_ts: int, task_id: Optional[int]):
+        if due_ts > self._loaded_until:
+            return  # picked up by the next refill
+        if task_id is None:
+            # bulk insert: re-read the current window instead of pushing each task
+            self._loaded_until = 0
+            self._wake.set()
+            return
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (due_ts, task_id, False))
+        if self._arrived is not None:
+            self._arrived.append((due_ts, task_id, False))
+        if earliest is None or due_ts < earliest:
+            self._wake.set()
+
+    async def _refill(self, now: float):
+        # SQLite runs in a thread: under write contention a call can wait up to busy_timeout
+        purged = await asyncio.to_thread(outbox_model.purge_older_than, int(now) - OUTBOX_RETENTION_SECONDS)
+        if purged:
+            print(f"[SCHEDULER] purged {purged} expired outbox items")
+        until = int(now) + self.horizon
+        # tasks pushed while the query runs may have committed after it read: keep them
+        self._loaded_until = until
+        self._arrived = []
+        try:
+            rows = await asyncio.to_thread(self.task_service.pending_due_dates, until)
+        finally:
+            arrived, self._arrived = self._arrived, None
+        self._heap = [(r["due_at"], r["id"], False) for r in rows] + arrived
+        heapq.heapify(self._heap)
+
+    # --- consumer --------------------------------------------------------
+
+    def _next_timeout(self, now: float) -> float:
+        deadline = self._loaded_until
+        if self._heap:
+            deadline = min(deadline, self._heap[0][0])
+        return max(0.0, deadline - now)
+
+    async def _fire(self, now: float):
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id, is_retry = heapq.heappop(self._heap)
+            due[task_id] = due.get(task_id, True) and is_retry
+        tasks = await asyncio.to_thread(self.task_service.claim_due_tasks, self.owner, self.lease_seconds)
+        claimed = {t["id"] for t in tasks}
+
+        # leased elsewhere: look again once that lease could have expired
+        retry_at = int(now) + self.lease_seconds + 1
+        for task_id, was_retry in due.items():
+            if task_id not in claimed and not was_retry:
+                heapq.heappush(self._heap, (retry_at, task_id, True))
+
+        if tasks:
+            print(f"[SCHEDULER] claimed {len(tasks)} overdue tasks")
+            # deliver in the background so the next due time isn't delayed
+            sending = asyncio.create_task(self._deliver(tasks))
+            self._sending.add(sending)
+            sending.add_done_callback(self._sending.discard)
+
+    async def _deliver(self, tasks):
+        try:
+            # persist first: the outbox is what survives offline users and crashes
+            reminders = [(t["id"], t["user_id"], reminder_payload(t)) for t in tasks]
+            queued = await asyncio.to_thread(self.task_service.ack_into_outbox, self.owner, reminders)
+        except Exception as e:
+            print(f"[SCHEDULER] delivering {len(tasks)} reminders failed:", repr(e))
+            await self._retry_later([t["id"] for t in tasks])
+            return
+        # past the ack the reminders are in the outbox: a failed send is replayed on reconnect
+        await send_reminders(queued)
+        sent_at = time.time()
+        for t in tasks:
+            REMINDER_LAG_SECONDS.observe(sent_at - t["due_date"])
+
+    async def _retry_later(self, task_ids):
+        now = int(time.time())
+        try:
+            await asyncio.to_thread(self.task_service.release_tasks, self.owner, task_ids)
+            retry_at = now + DELIVER_RETRY_SECONDS
+        except Exception as e:
+            # still leased to us: it can only be claimed again once the lease expires
+            print("[SCHEDULER] releasing leases failed:", repr(e))
+            retry_at = now + self.lease_seconds + 1
+        for task_id in task_ids:
+            heapq.heappush(self._heap, (retry_at, task_id, True))
+        self._wake.set()
+
+    async def _step(self):
+        now = time.time()
+        if now >= self._loaded_until:
+            await self._refill(now)
+        if self._heap and self._heap[0][0] <= now:
+            await self._fire(now)
+            return
+
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self._next_timeout(now))
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        caught_up = False
+        failures = 0
+
+        while True:
+            try:
+                if not caught_up:
+                    # catch up on anything that became due while the process was down
+                    await self._fire(time.time())
+                    await self._refill(time.time())
+                    caught_up = True
+                await self._step()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(ERROR_BACKOFF_SECONDS * 2 ** (failures - 1), MAX_ERROR_BACKOFF_SECONDS)
+                print(f"[SCHEDULER] loop error ({failures}x), retrying in {delay:.1f}s:", repr(e))
+                # tasks popped by a failed _fire are still pending in the DB: re-read the window
+                self._loaded_until = 0
+                await asyncio.sleep(delay)
+
+
+def reminder_payload(task) -> dict:
+    return {
+        "type": "reminder",
+        "title": task["title"],
+        "description": task["description"],
+        "due_date": datetime.fromtimestamp(
+            task["due_date"]
+        ).isoformat()
+    }
+
+
+async def send_reminders(reminders, send=None, concurrency: int = SEND_CONCURRENCY, timeout: float = SEND_TIMEOUT):
+    """Deliver ``[(user_id, payload), ...]`` concurrently.
+
+    One slow socket can't hold up the rest. Returns the number of reminders
+    handed off without error or timeout; the rest stay in the outbox and are
+    replayed when the client reconnects.
+    """
+    if not reminders:
+        return 0
+    send = send or manager.send_to_user
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _send_one(user_id, payload) -> bool:
+        async with sem:
+            try:
+                await asyncio.wait_for(send(user_id, payload), timeout)
+                return True
+            except asyncio.TimeoutError:
+                print("[SCHEDULER] send timed out for user", user_id)
+            except Exception as e:
+                print("[SCHEDULER] send failed for user", user_id, e)
+            return False
+
+    results = await asyncio.gather(*(_send_one(u, p) for u, p in reminders))
+    delivered = sum(results)
+    print(f"[SCHEDULER] {delivered}/{len(reminders)} reminders sent")
+    return delivered
+
 
 async def task_reminder_worker(task_service):
     print("[SCHEDULER] Reminder worker started")
 
-    while True:
-        tasks = task_service.check_overdue_tasks()
-        print(f"[SCHEDULER] found {len(tasks)} overdue tasks")
-
-        for task in tasks:
-            await manager.send_to_user(
-                task["user_id"],
-                {
-                    "type": "reminder",
-                    "title": task["title"],
-                    "description": task["description"],
-                    "due_date": datetime.fromtimestamp(
-                        task["due_date"]
-                    ).isoformat()
-                }
-            )
-
-            print("[SCHEDULER] reminder sent to", task["user_id"])
-
-        await asyncio.sleep(5)
+    scheduler = ReminderScheduler(task_service)
+    add_task_listener(scheduler.notify)
+    try:
+        await scheduler.run()
+    finally:
+        remove_task_listener(scheduler.notify)
@@ -0,0 +1,28 @@
+import os
+import time
+import asyncio
+
+from models import users_model
+
+# how often this worker merges revocations made by other workers. A logout on
+# another worker is honoured here within this window (immediately on the worker
+# that handled it); each sync only reads rows added since the previous one.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "1"))
+PURGE_INTERVAL_SECONDS = float(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", "600"))
+
+
+async def token_janitor():
+    """Keep the in-memory revocation set fresh and purge expired token rows."""
+    print("[TOKENS] Janitor started")
+    next_purge = time.monotonic()
+    while True:
+        try:
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                deleted = await asyncio.to_thread(users_model.purge_expired_tokens)
+                if any(deleted.values()):
+                    print(f"[TOKENS] Purged expired rows: {deleted}")
+            await asyncio.to_thread(users_model.sync_revocations)
+        except Exception as e:
+            print("[TOKENS] Janitor error:", e)
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
@@ -39,8 +39,12 @@ class ChatAction(BaseModel):
     target: str
     packages: Optional[List[str]] = None
     scheme: Optional[str] = None
+    play_store: Optional[List[str]] = None
+    intent_templates: Optional[List[str]] = None
+    span: Optional[List[int]] = None
 
 
 class ChatResponse(BaseModel):
     reply: str
     action: ChatAction | None = None
+    actions: List[ChatAction] = []
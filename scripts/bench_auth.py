@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Benchmark per-request auth cost of ``get_current_user``.
+
+"cold" clears the principal cache before every call (the old behaviour:
+one user lookup in SQLite per request); "warm" lets the cache serve the
+user after the first call.
+
+Usage:
+  python scripts/bench_auth.py [--requests 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import db  # noqa: E402
+from models import users_model  # noqa: E402
+from services import assistant_service  # noqa: E402
+
+
+def _time(n: int, token: str, clear: bool) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        if clear:
+            users_model.principal_cache.clear()
+        assistant_service.get_current_user(token)
+    return (time.perf_counter() - t0) / n
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, "auth.db"))
+        user = users_model.add_user("bench", "bench@example.com", "x", "y")
+        token = assistant_service.create_access_token({"sub": "bench", "id": user["id"]})
+        assistant_service.get_current_user(token)
+
+        cold = _time(n, token, clear=True)
+        warm = _time(n, token, clear=False)
+        db.close_pool()
+
+    print(f"requests: {n}")
+    print(f"cold    : {cold * 1e6:9.1f} us/request")
+    print(f"warm    : {warm * 1e6:9.1f} us/request")
+    print(f"speedup : {cold / warm:9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark prompt size and prompt-build latency over long conversations.
+
+Compares the bounded ``ConversationStore`` (window + running summary) with
+naively sending the whole history. Summaries use a local stub so the run is
+offline and deterministic.
+
+Usage:
+  python scripts/bench_conversation.py [--turns 5000] [--window 1024]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.conversation_service import ConversationStore, estimate_tokens, extractive_summarizer  # noqa: E402
+
+WORDS = "saya mau tanya tentang jadwal kuliah besok pagi apakah bisa bantu atur pengingat rapat kantor".split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+
+
+async def _stub_summarizer(summary, turns):
+    await asyncio.sleep(0.001)  # pretend to be a (fast) remote call
+    return await extractive_summarizer(summary, turns)
+
+
+def _prompt_tokens(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+async def run(turns: int, window: int):
+    rng = random.Random(42)
+    store = ConversationStore(window_tokens=window, summary_tokens=256, summarizer=_stub_summarizer)
+    naive = []
+    checkpoints = {10, 100, 1000, turns} | {c for c in (2500, 5000, 10000) if c < turns}
+
+    print(f"{'turn':>6} | {'bounded tok':>11} {'build us':>9} | {'naive tok':>10} {'build us':>9}")
+    for i in range(1, turns + 1):
+        msg, reply = _sentence(rng), _sentence(rng)
+
+        if i in checkpoints:
+            t0 = time.perf_counter()
+            bounded_msgs = store.context(1) + [{"role": "user", "content": msg}]
+            bounded_us = (time.perf_counter() - t0) * 1e6
+            t0 = time.perf_counter()
+            naive_msgs = list(naive) + [{"role": "user", "content": msg}]
+            naive_us = (time.perf_counter() - t0) * 1e6
+            print(f"{i:>6} | {_prompt_tokens(bounded_msgs):>11} {bounded_us:>9.1f} | {_prompt_tokens(naive_msgs):>10} {naive_us:>9.1f}")
+
+        store.append(1, msg, reply)
+        naive += [{"role": "user", "content": msg}, {"role": "assistant", "content": reply}]
+        await asyncio.sleep(0)  # let background summarization run
+    await store.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=1024)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.window))
+
+
+if __name__ == "__main__":
+    main()
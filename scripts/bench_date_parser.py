@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Accuracy and speed of the rule-based Indonesian date parser vs dateparser.
+
+Runs a fixed corpus of reminder messages (with expected due datetimes
+relative to a pinned "now") through ``services.date_parser`` with and
+without the dateparser fallback, and through plain ``dateparser`` the way
+``extract_task_from_chat`` used to call it. The dateparser rows are
+skipped when it isn't installed.
+
+Usage:
+  python scripts/bench_date_parser.py [--repeat 200] [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import date_parser  # noqa: E402
+
+NOW = datetime(2026, 10, 14, 10, 0)  # a Wednesday
+
+CORPUS = [
+    ("ingatkan saya hari ini jam 3 sore rapat", datetime(2026, 10, 14, 15, 0)),
+    ("ingatkan saya besok jam 7 malam minum obat", datetime(2026, 10, 15, 19, 0)),
+    ("ingatkan saya besok pagi olahraga", datetime(2026, 10, 15, 7, 0)),
+    ("ingatkan saya lusa jam 8 bayar listrik", datetime(2026, 10, 16, 8, 0)),
+    ("ingatkan saya 3 hari lagi jam 9 kirim laporan", datetime(2026, 10, 17, 9, 0)),
+    ("ingatkan saya seminggu lagi jam 10 servis motor", datetime(2026, 10, 21, 10, 0)),
+    ("ingatkan saya 2 minggu lagi jam 6 sore", datetime(2026, 10, 28, 18, 0)),
+    ("ingatkan saya senin jam 8 pagi", datetime(2026, 10, 19, 8, 0)),
+    ("ingatkan saya jumat jam 1 siang jumatan", datetime(2026, 10, 16, 13, 0)),
+    ("ingatkan saya senin depan jam 9", datetime(2026, 10, 19, 9, 0)),
+    ("ingatkan saya hari minggu jam 7 pagi", datetime(2026, 10, 18, 7, 0)),
+    ("ingatkan saya tanggal 20 jam 8 bayar kos", datetime(2026, 10, 20, 8, 0)),
+    ("ingatkan saya tanggal 5 jam 8 gajian", datetime(2026, 11, 5, 8, 0)),
+    ("ingatkan saya tanggal 1 bulan depan jam 9", datetime(2026, 11, 1, 9, 0)),
+    ("ingatkan saya tanggal 5 maret jam 10 ulang tahun ibu", datetime(2027, 3, 5, 10, 0)),
+    ("ingatkan saya 17 agustus 2027 pukul 07.30 upacara", datetime(2027, 8, 17, 7, 30)),
+    ("ingatkan saya 25 des jam 6 pagi", datetime(2026, 12, 25, 6, 0)),
+    ("ingatkan saya tanggal 1/12 jam 9 malam", datetime(2026, 12, 1, 21, 0)),
+    ("ingatkan saya 1/12/2026 jam 9 malam", datetime(2026, 12, 1, 21, 0)),
+    ("ingatkan saya rapat di ruang 3/4 jam 9 pagi", datetime(2026, 10, 15, 9, 0)),
+    ("ingatkan saya 2026-11-30 jam 14:00", datetime(2026, 11, 30, 14, 0)),
+    ("ingatkan saya besok jam setengah 8", datetime(2026, 10, 15, 7, 30)),
+    ("ingatkan saya besok jam 7.5", datetime(2026, 10, 15, 7, 5)),
+    ("ingatkan saya jam 7 malam", datetime(2026, 10, 14, 19, 0)),
+    ("ingatkan saya jam 8 pagi", datetime(2026, 10, 15, 8, 0)),
+    ("ingatkan saya 30 menit lagi angkat jemuran", datetime(2026, 10, 14, 10, 30)),
+    ("ingatkan saya 2 jam lagi jemput adik", datetime(2026, 10, 14, 12, 0)),
+    ("ingatkan saya setengah jam lagi", datetime(2026, 10, 14, 10, 30)),
+    ("ingatkan saya 2 jam 30 menit lagi", datetime(2026, 10, 14, 12, 30)),
+    ("ingatkan saya 1 jam setengah lagi", datetime(2026, 10, 14, 11, 30)),
+    ("ingatkan saya satu setengah jam lagi", datetime(2026, 10, 14, 11, 30)),
+    ("ingatkan saya besok 19:45 nonton bola", datetime(2026, 10, 15, 19, 45)),
+]
+
+
+def legacy_parse(msg: str):
+    # the pre-rules extract_task_from_chat: manual "jam" + hari ini/besok + dateparser
+    import dateparser
+
+    m = re.search(r"jam\s*(\d{1,2})(?:[:.](\d{1,2}))?", msg)
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2) or 0)
+    if ("malam" in msg or "sore" in msg) and hour < 12:
+        hour += 12
+    elif "pagi" in msg and hour == 12:
+        hour = 0
+    if "hari ini" in msg:
+        day = NOW.date()
+    elif "besok" in msg:
+        day = (NOW + timedelta(days=1)).date()
+    else:
+        parsed = dateparser.parse(msg, languages=["id"], settings={"PREFER_DATES_FROM": "future", "RELATIVE_BASE": NOW})
+        if not parsed:
+            return None
+        day = parsed.date()
+    return datetime(day.year, day.month, day.day, hour, minute)
+
+
+def _measure(label, fn, repeat, verbose):
+    correct = 0
+    for msg, expected in CORPUS:
+        got = fn(msg)
+        correct += got == expected
+        if verbose and got != expected:
+            print(f"  [{label}] {msg!r}: got {got}, expected {expected}")
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for msg, _ in CORPUS:
+            fn(msg)
+    per_call = (time.perf_counter() - t0) / (repeat * len(CORPUS))
+    print(f"{label:18s}: {correct:3d}/{len(CORPUS)} correct  {per_call * 1e6:10.1f} us/message")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    _measure("rules", lambda m: date_parser.parse_datetime(m, NOW, fallback=False), args.repeat, args.verbose)
+    try:
+        import dateparser  # noqa: F401
+    except ImportError:
+        print("dateparser not installed; skipping the dateparser paths")
+        return
+    _measure("rules + fallback", lambda m: date_parser.parse_datetime(m, NOW), args.repeat, args.verbose)
+    _measure("legacy dateparser", legacy_parse, max(1, args.repeat // 20), args.verbose)
+
+
+if __name__ == "__main__":
+    main()
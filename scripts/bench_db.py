@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Benchmark per-request SQLite overhead: legacy connect-per-query vs the pool.
+
+A simulated authenticated chat request does what the app does on the hot
+path: ``is_token_revoked`` + ``find_user`` + one task insert.
+
+Usage:
+  python scripts/bench_db.py [--requests 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import db  # noqa: E402
+from models.migrations import BASE_SCHEMA  # noqa: E402
+from models import users_model  # noqa: E402
+from services.task_service import TaskService  # noqa: E402
+
+
+def _legacy_conn(path):
+    conn = sqlite3.connect(path, timeout=5)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _legacy_ensure(path):
+    conn = _legacy_conn(path)
+    try:
+        for stmt in BASE_SCHEMA:
+            conn.execute(stmt)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def legacy_request(path, task):
+    # mirrors the pre-pool code: _ensure_db() + fresh connection per call
+    _legacy_ensure(path)
+    conn = _legacy_conn(path)
+    try:
+        conn.execute("SELECT expires_at FROM revoked_tokens WHERE jti = ?", ("nope",)).fetchone()
+    finally:
+        conn.close()
+    _legacy_ensure(path)
+    conn = _legacy_conn(path)
+    try:
+        conn.execute("SELECT id, username, email, password_hash, salt FROM users WHERE username = ?", ("bench",)).fetchone()
+    finally:
+        conn.close()
+    conn = _legacy_conn(path)
+    try:
+        conn.execute(
+            "INSERT INTO tasks (user_id, title, description, due_date, created_at, is_completed, is_notified) VALUES (?, ?, ?, ?, ?, 0, 0)",
+            (1, task.title, task.description, int(task.due_date.timestamp()), int(time.time())),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def pooled_request(service, task):
+    users_model.is_token_revoked("nope")
+    users_model.find_user("bench")
+    service.create_task(task, 1)
+
+
+def run(n: int):
+    task = SimpleNamespace(title="Reminder", description="bench", due_date=datetime.now() + timedelta(days=1))
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        _legacy_ensure(legacy_path)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            legacy_request(legacy_path, task)
+        legacy = (time.perf_counter() - t0) / n
+
+        db.configure(os.path.join(tmp, "pooled.db"))
+        users_model.add_user("bench", "bench@example.com", "x", "y")
+        service = TaskService()
+        t0 = time.perf_counter()
+        for _ in range(n):
+            pooled_request(service, task)
+        pooled = (time.perf_counter() - t0) / n
+        db.close_pool()
+
+    print(f"requests: {n}")
+    print(f"legacy  : {legacy * 1e6:9.1f} us/request")
+    print(f"pooled  : {pooled * 1e6:9.1f} us/request")
+    print(f"speedup : {legacy / pooled:9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
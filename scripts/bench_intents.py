@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark open-app intent matching as the number of apps grows.
+
+"legacy" is the old ``_detect_open_app_intent``: rebuild the app dict and
+substring-scan every app name per message. "registry" is the word-trie
+``IntentRegistry``. Synthetic apps are added on top of the real config.
+
+Usage:
+  python scripts/bench_intents.py [--apps 5,50,500,2000] [--messages 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.intent_service import IntentRegistry, _templates  # noqa: E402
+
+# (message, expected targets) checked before timing
+PHRASES = [
+    ("buka whatsapp", ["whatsapp"]),
+    ("buka whatsappnya", ["whatsapp"]),
+    ("tolong buka whats appnya dong", ["whatsapp"]),
+    ("buka browsernya lalu kirim ke whatsapp dan telegram", ["browser", "whatsapp", "telegram"]),
+    ("buka instagramku", ["instagram"]),
+    ("buka telegrammu dong", ["telegram"]),
+    ("chromelah yang cepat", ["chrome"]),
+    ("buka google chromenya", ["chrome"]),
+    ("browsers", []),
+    ("buka youtubeku", []),  # no youtube in config/intents.json
+    ("cari tanya", []),
+]
+
+WORDS = "tolong buka aplikasi dong aku mau kirim pesan ke teman lewat sekarang juga ya cepat".split()
+
+
+def _apps(n: int):
+    base = IntentRegistry.from_file().apps
+    apps = {k: {"aliases": [k], "packages": v["packages"], "scheme": v["scheme"]} for k, v in base.items()}
+    for i in range(max(0, n - len(apps))):
+        name = f"aplikasi{i}"
+        apps[name] = {"aliases": [name], "packages": [f"com.example.app{i}"], "scheme": f"app{i}://"}
+    return apps
+
+
+def legacy_detect(apps, text: str):
+    t = text.lower()
+    table = {k: dict(v) for k, v in apps.items()}  # rebuilt on every call, like before
+    for k, meta in table.items():
+        if k in t:
+            packages = meta.get("packages") or []
+            return {
+                "type": "open_app",
+                "target": k,
+                "packages": packages,
+                "scheme": meta.get("scheme"),
+                "play_store": [f"https://play.google.com/store/apps/details?id={p}" for p in packages],
+                "intent_templates": _templates(packages, meta.get("scheme")),
+            }
+    return None
+
+
+def _messages(apps, n: int, rng: random.Random):
+    names = list(apps)
+    out = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(names))
+        out.append(" ".join(words))
+    return out
+
+
+def _time(fn, messages):
+    t0 = time.perf_counter()
+    for m in messages:
+        fn(m)
+    return (time.perf_counter() - t0) / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apps", default="5,50,500,2000")
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    registry = IntentRegistry.from_file()
+    failed = 0
+    for text, expected in PHRASES:
+        got = [i["target"] for i in registry.detect(text)]
+        failed += got != expected
+        print(f"  {'ok' if got == expected else 'FAIL':4s} {text!r}: {got}")
+    print(f"{len(PHRASES) - failed}/{len(PHRASES)} phrases matched\n")
+
+    print(f"{'apps':>6} {'legacy us/msg':>14} {'registry us/msg':>16}")
+    for n in (int(x) for x in args.apps.split(",")):
+        apps = _apps(n)
+        registry = IntentRegistry(apps)
+        messages = _messages(apps, args.messages, random.Random(n))
+        legacy = _time(lambda m: legacy_detect(apps, m), messages)
+        trie = _time(registry.detect, messages)
+        print(f"{len(apps):6d} {legacy * 1e6:14.1f} {trie * 1e6:16.1f}")
+
+    registry = IntentRegistry.from_file()
+    sample = "buka browsernya lalu kirim ke whatsapp dan telegram"
+    print(f"\n{sample!r}")
+    print("  legacy  :", (legacy_detect(_apps(0), sample) or {}).get("target"))
+    print("  registry:", [(i["target"], i["span"]) for i in registry.detect(sample)])
+
+
+if __name__ == "__main__":
+    main()
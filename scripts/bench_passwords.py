@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark password verification under concurrent logins.
+
+Compares hashing inline on the event loop (what a sync KDF call in an async
+route would do) against the bounded hasher pool. Reports logins/s and the
+worst event-loop stall seen by a 10 ms ticker, i.e. how long every other
+request on the worker would have been frozen.
+
+Usage:
+  python scripts/bench_passwords.py [--logins 64] [--concurrency 32] [--workers 2] [--algorithm scrypt]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.password_hasher import PasswordHasher, PasswordHasherBusy  # noqa: E402
+
+
+async def _ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - t0 - 0.01)
+
+
+async def _run(hasher: PasswordHasher, stored: str, logins: int, concurrency: int, inline: bool):
+    sem = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with sem:
+            if inline:
+                assert hasher.check("hunter2", "salt", stored)
+                await asyncio.sleep(0)
+                return
+            while True:
+                try:
+                    assert await hasher.verify("hunter2", "salt", stored)
+                    return
+                except PasswordHasherBusy:
+                    rejected += 1
+                    await asyncio.sleep(0.01)
+
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    return elapsed, max(lags) if lags else 0.0, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--algorithm", choices=["scrypt", "pbkdf2_sha256"], default="scrypt")
+    parser.add_argument("--scrypt-n", type=int, default=2 ** 14)
+    parser.add_argument("--iterations", type=int, default=600000)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(
+        algorithm=args.algorithm,
+        scrypt_n=args.scrypt_n,
+        pbkdf2_iterations=args.iterations,
+        workers=args.workers,
+        max_pending=args.max_pending,
+    )
+    stored = hasher.encode("hunter2", "salt")
+    t0 = time.perf_counter()
+    hasher.check("hunter2", "salt", stored)
+    single = time.perf_counter() - t0
+    print(f"{args.algorithm}: {single * 1000:.1f} ms per hash, {args.logins} logins, concurrency {args.concurrency}")
+
+    for label, inline in (("inline", True), (f"pool({args.workers})", False)):
+        elapsed, lag, rejected = asyncio.run(_run(hasher, stored, args.logins, args.concurrency, inline))
+        print(
+            f"{label:10s}: {args.logins / elapsed:7.1f} logins/s  "
+            f"max loop stall {lag * 1000:7.1f} ms  busy rejections {rejected}"
+        )
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
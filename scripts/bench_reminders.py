@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark reminder delivery lag for many tasks due at the same moment.
+
+Inserts N tasks with the same due time, then compares the legacy path
+(SELECT * + one UPDATE per row, sequential sends) with the batch claim
++ bounded concurrent fan-out. Sockets are simulated with a small send delay;
+a fraction of them are slow.
+
+Usage:
+  python scripts/bench_reminders.py [--tasks 10000] [--slow 0.01]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import db  # noqa: E402
+from services.task_service import TaskService  # noqa: E402
+from scheduler.reminder_worker import reminder_payload, send_reminders  # noqa: E402
+
+FAST_SEND = 0.001
+SLOW_SEND = 0.5
+
+
+def _seed(n: int, due_ts: int):
+    with db.connection() as conn:
+        conn.execute("DELETE FROM tasks")
+        conn.executemany(
+            "INSERT INTO tasks (user_id, title, description, due_date, created_at, is_completed, is_notified) VALUES (?, ?, ?, ?, ?, 0, 0)",
+            [(i, "Reminder", "bench", due_ts, due_ts) for i in range(n)],
+        )
+        conn.commit()
+
+
+def _legacy_claim():
+    now = int(time.time())
+    conn = sqlite3.connect(db.DB_PATH, timeout=5)
+    conn.row_factory = sqlite3.Row
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM tasks WHERE is_completed = 0 AND is_notified = 0 AND due_date <= ?", (now,))
+        rows = cur.fetchall()
+        for r in rows:
+            cur.execute("UPDATE tasks SET is_notified = 1 WHERE id = ?", (r["id"],))
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def _make_send(slow_ids, lags, due_ts):
+    async def send(user_id, message):
+        await asyncio.sleep(SLOW_SEND if user_id in slow_ids else FAST_SEND)
+        lags.append(time.time() - due_ts)
+    return send
+
+
+def _report(name, claim_s, lags, total_s):
+    lags = sorted(lags)
+    p = lambda q: lags[min(len(lags) - 1, int(q * len(lags)))]  # noqa: E731
+    print(
+        f"{name:<10} claim {claim_s * 1000:8.1f} ms | lag p50 {p(0.5):8.3f} s  p99 {p(0.99):8.3f} s  "
+        f"max {lags[-1]:8.3f} s | total {total_s:8.2f} s | mean {statistics.mean(lags):.3f} s"
+    )
+
+
+async def _run_legacy(n, slow_ids):
+    due_ts = time.time()
+    _seed(n, int(due_ts))
+    lags = []
+    send = _make_send(slow_ids, lags, due_ts)
+    t0 = time.perf_counter()
+    rows = _legacy_claim()
+    claim = time.perf_counter() - t0
+    for task in rows:
+        await send(task["user_id"], reminder_payload(task))
+    _report("legacy", claim, lags, time.perf_counter() - t0)
+
+
+async def _run_batched(n, slow_ids, concurrency):
+    due_ts = time.time()
+    _seed(n, int(due_ts))
+    lags = []
+    send = _make_send(slow_ids, lags, due_ts)
+    t0 = time.perf_counter()
+    rows = TaskService().check_overdue_tasks()
+    claim = time.perf_counter() - t0
+    reminders = [(r["user_id"], reminder_payload(r)) for r in rows]
+    await send_reminders(reminders, send=send, concurrency=concurrency, timeout=5)
+    _report("batched", claim, lags, time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--slow", type=float, default=0.01, help="fraction of slow sockets")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--skip-legacy", action="store_true", help="legacy run takes tasks * send delay")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    slow_ids = set(rng.sample(range(args.tasks), int(args.tasks * args.slow)))
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(os.path.join(tmp, "bench.db"))
+        print(f"{args.tasks} tasks due at {datetime.now():%H:%M:%S}, {len(slow_ids)} slow sockets")
+        if not args.skip_legacy:
+            asyncio.run(_run_legacy(args.tasks, slow_ids))
+        asyncio.run(_run_batched(args.tasks, slow_ids, args.concurrency))
+        db.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Startup benchmark: ``import main`` time and time to first response.
+
+Each run uses a fresh interpreter:
+
+1. ``python -X importtime -c "import main"`` -- wall time of the import,
+   plus the slowest top-level imports from the importtime log;
+2. ``uvicorn main:app`` on a free port, polling ``GET /`` until it answers
+   200 -- time from spawn to first successful response.
+
+Pass ``--save FILE`` to record the medians and ``--baseline FILE`` to fail
+(exit 1) when a median regresses by more than ``--tolerance``.
+
+Usage:
+  python scripts/bench_startup.py [--runs 5] [--no-serve] [--baseline startup.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TMP = tempfile.mkdtemp(prefix="bench-startup-")
+
+
+def _env():
+    env = dict(os.environ)
+    env["ASSISTANT_DB_PATH"] = os.path.join(TMP, "users.db")
+    env.pop("APP_WARMUP", None)
+    env.pop("OPENROUTER_WARMUP", None)
+    return env
+
+
+def measure_import():
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise SystemExit(f"import main failed:\n{proc.stderr[-2000:]}")
+    top = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            top.append((int(cumulative), name.strip()))
+    top.sort(reverse=True)
+    return elapsed, top[:10]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_response(timeout: float = 30.0) -> float:
+    port = _free_port()
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise SystemExit("uvicorn exited before answering")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit("no response within timeout")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-serve", action="store_true", help="only measure import time")
+    parser.add_argument("--save", help="write medians as JSON")
+    parser.add_argument("--baseline", help="compare against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (fraction)")
+    args = parser.parse_args()
+
+    imports, top = [], []
+    for _ in range(args.runs):
+        elapsed, top = measure_import()
+        imports.append(elapsed)
+    result = {"import_s": statistics.median(imports)}
+    print(f"import main        : median {result['import_s'] * 1000:7.1f} ms  (min {min(imports) * 1000:.1f})")
+    print("slowest top-level imports (last run):")
+    for cumulative, name in top:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if not args.no_serve:
+        firsts = [measure_first_response() for _ in range(args.runs)]
+        result["first_response_s"] = statistics.median(firsts)
+        print(f"first response     : median {result['first_response_s'] * 1000:7.1f} ms  (min {min(firsts) * 1000:.1f})")
+
+    shutil.rmtree(TMP, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failed = False
+        for key, value in result.items():
+            base = baseline.get(key)
+            if base and value > base * (1 + args.tolerance):
+                print(f"REGRESSION {key}: {value * 1000:.1f} ms vs baseline {base * 1000:.1f} ms")
+                failed = True
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
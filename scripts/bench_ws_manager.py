@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Load-test ConnectionManager with tens of thousands of simulated sockets.
+
+Every simulated socket has a small send latency; a fraction is very slow.
+Measures connect time, per-message fan-out cost on the producer side, time
+until fast sockets have received everything, and how many messages were
+dropped for slow sockets under the overflow policy.
+
+Usage:
+  python scripts/bench_ws_manager.py [--sockets 20000] [--users 5000] [--messages 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.ws_manager import ConnectionManager  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def run(sockets: int, users: int, messages: int, slow: float, queue: int, overflow: str):
+    rng = random.Random(7)
+    manager = ConnectionManager(max_queue=queue, overflow=overflow)
+    fakes = [FakeWebSocket(1.0 if rng.random() < slow else 0.0) for _ in range(sockets)]
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        conns = [await manager.connect(i % users, ws) for i, ws in enumerate(fakes)]
+    connect_s = time.perf_counter() - t0
+
+    produce_s = 0.0
+    for n in range(messages):
+        t0 = time.perf_counter()
+        if n % 2:
+            await manager.broadcast({"type": "tick", "n": n})
+        else:
+            await manager.send_to_users(range(0, users, 2), {"type": "tick", "n": n})
+        produce_s += time.perf_counter() - t0
+        await asyncio.sleep(0)  # let sender tasks run, like a real producer would
+
+    expected = {id(ws): 0 for ws in fakes}
+    for n in range(messages):
+        for conn in conns:
+            if n % 2 or conn.user_id % 2 == 0:
+                expected[id(conn.websocket)] += 1
+
+    fast = [c for c in conns if not c.websocket.delay]
+    t0 = time.perf_counter()
+    while any(c.websocket.received + c.dropped < expected[id(c.websocket)] and not c.closed for c in fast):
+        await asyncio.sleep(0.01)
+    drain_s = time.perf_counter() - t0
+
+    dropped = sum(c.dropped for c in conns)
+    fast_dropped = sum(c.dropped for c in fast)
+    print(f"sockets: {sockets}  users: {users}  slow: {sum(1 for ws in fakes if ws.delay)}  queue: {queue}  overflow: {overflow}")
+    print(f"connect         : {connect_s:8.3f} s")
+    print(f"produce {messages} msgs : {produce_s * 1000:8.1f} ms  ({produce_s / messages * 1e6:.0f} us/message)")
+    print(f"fast sockets done: {drain_s:8.3f} s after last enqueue")
+    print(f"dropped         : {dropped} ({fast_dropped} on fast sockets)")
+    print(f"still connected : {manager.connection_count()}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for conn in conns:
+            manager.disconnect(conn)
+    await asyncio.sleep(0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sockets", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--slow", type=float, default=0.01, help="fraction of slow sockets")
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--overflow", choices=["drop_oldest", "disconnect"], default="drop_oldest")
+    args = parser.parse_args()
+    asyncio.run(run(args.sockets, args.users, args.messages, args.slow, args.queue, args.overflow))
+
+
+if __name__ == "__main__":
+    main()
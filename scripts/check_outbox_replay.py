@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Check that outbox replay on reconnect delivers every pending reminder.
+
+A user has more pending reminders than fit in a socket's queue (and more
+than one replay page); while the replay runs, new reminders keep arriving
+the way the scheduler sends them (outbox append, then ``enqueue``). For
+each overflow policy, every seq must reach the socket, the replayed ones in
+order, and the socket must stay open.
+
+Exits non-zero on a missing seq, an out-of-order replay or a disconnect.
+
+Usage:
+  python scripts/check_outbox_replay.py [--pending 1200] [--live 300] [--queue 256]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import db, outbox_model  # noqa: E402
+from controllers.ws_controller import _replay_outbox  # noqa: E402
+from utils.ws_manager import ConnectionManager  # noqa: E402
+
+USER_ID = 1
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.seqs = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(0)  # let producers interleave with the replay
+        self.seqs.append(json.loads(text)["seq"])
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def _append(count: int):
+    with db.connection() as conn:
+        seqs = [outbox_model.append(conn, USER_ID, {"type": "reminder", "title": "t"}) for _ in range(count)]
+        conn.commit()
+    return seqs
+
+
+async def _live(conn, count: int):
+    for _ in range(count):
+        seq = (await asyncio.to_thread(_append, 1))[0]
+        conn.enqueue(json.dumps({"type": "reminder", "title": "t", "seq": seq}))
+
+
+async def run(policy: str, pending: int, live: int, queue: int) -> bool:
+    with db.connection() as conn:
+        conn.execute("DELETE FROM reminder_outbox")
+        conn.execute("DELETE FROM outbox_cursors")
+        conn.commit()
+    _append(pending)
+
+    manager = ConnectionManager(max_queue=queue, overflow=policy)
+    ws = FakeWebSocket()
+    conn = await manager.connect(USER_ID, ws)
+    await asyncio.gather(_replay_outbox(conn, USER_ID, 0), _live(conn, live))
+    for _ in range(100):  # let the sender task drain what's queued
+        if conn.queue.empty():
+            break
+        await asyncio.sleep(0.01)
+    manager.disconnect(conn)
+
+    expected = set(range(1, pending + live + 1))
+    missing = sorted(expected - set(ws.seqs))
+    replayed = ws.seqs[:pending]
+    ok = not missing and replayed == sorted(replayed) and ws.closed_with is None
+    print(f"{policy:12s}: {len(set(ws.seqs))}/{len(expected)} seqs delivered, "
+          f"missing {missing[:10]}{'...' if len(missing) > 10 else ''}, closed={ws.closed_with}  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pending", type=int, default=1200)
+    parser.add_argument("--live", type=int, default=300)
+    parser.add_argument("--queue", type=int, default=256)
+    args = parser.parse_args()
+
+    db.configure(os.path.join(tempfile.mkdtemp(prefix="check-replay-"), "users.db"))
+    db.init_db()
+    results = [asyncio.run(run(policy, args.pending, args.live, args.queue)) for policy in ("drop_oldest", "disconnect")]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
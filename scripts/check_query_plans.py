@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Fail if a hot query falls back to a full table scan.
+
+Migrates a database (a temporary one by default) to the latest schema and
+runs EXPLAIN QUERY PLAN for every entry in ``models.migrations.HOT_QUERIES``.
+
+Usage:
+  python scripts/check_query_plans.py [--db path/to/users.db]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import migrations  # noqa: E402
+
+
+def check(path: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        version = migrations.migrate(conn)
+        offenders = migrations.table_scans(conn)
+    finally:
+        conn.close()
+    print(f"schema version: {version}")
+    for name in migrations.HOT_QUERIES:
+        print(f"  {'SCAN' if name in offenders else 'ok  '}  {name}")
+    for name, plan in offenders.items():
+        print(f"\n{name} falls back to a table scan:")
+        for line in plan:
+            print(f"    {line}")
+    return 1 if offenders else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", help="database to migrate and check (default: temporary file)")
+    args = parser.parse_args()
+    if args.db:
+        sys.exit(check(args.db))
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.exit(check(os.path.join(tmp, "users.db")))
+
+
+if __name__ == "__main__":
+    main()
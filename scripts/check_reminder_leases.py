@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Multi-process check that reminder leases deliver every task exactly once.
+
+1. A "crashing" worker claims the first batch of due tasks and exits without
+   acknowledging them.
+2. N workers then race ``claim_due_tasks`` / ``ack_tasks`` against the same
+   database while a second batch becomes due.
+3. Every task must be acknowledged by exactly one surviving worker, including
+   the crashed worker's tasks once their lease has expired.
+
+Exits non-zero on duplicates or missing reminders.
+
+Usage:
+  python scripts/check_reminder_leases.py [--workers 8] [--tasks 2000]
+"""
+import argparse
+import collections
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from models import db  # noqa: E402
+from services.task_service import TaskService  # noqa: E402
+
+LEASE_SECONDS = 2
+BATCH = 50  # small batches so workers interleave
+
+
+def _pending(conn) -> int:
+    return conn.execute("SELECT COUNT(*) FROM tasks WHERE is_notified = 0").fetchone()[0]
+
+
+def _crasher(path: str):
+    db.configure(path)
+    TaskService().claim_due_tasks("crasher", LEASE_SECONDS)
+    os._exit(1)  # die holding the leases
+
+
+def _worker(path: str, name: str, deadline: float, out):
+    db.configure(path)
+    service = TaskService()
+    acked = []
+    while time.time() < deadline:
+        rows = service.claim_due_tasks(name, LEASE_SECONDS, limit=BATCH)
+        if rows:
+            ids = [r["id"] for r in rows]
+            service.ack_tasks(name, ids)
+            acked.extend(ids)
+            continue
+        with db.connection() as conn:
+            if _pending(conn) == 0:
+                break
+        time.sleep(0.05)
+    out.put((name, acked))
+
+
+def _seed(path: str, n: int):
+    db.configure(path)
+    now = int(time.time())
+    half = n // 2
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO tasks (user_id, title, description, due_date, created_at, is_completed, is_notified) VALUES (?, ?, ?, ?, ?, 0, 0)",
+            [(i, "Reminder", "lease check", now if i < half else now + 1, now) for i in range(n)],
+        )
+        conn.commit()
+    db.close_pool()
+
+
+def run(workers: int, tasks: int) -> int:
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "leases.db")
+        _seed(path, tasks)
+
+        crasher = ctx.Process(target=_crasher, args=(path,))
+        crasher.start()
+        crasher.join()
+        db.configure(path)
+        with db.connection() as conn:
+            crashed_ids = [r[0] for r in conn.execute("SELECT id FROM tasks WHERE lease_owner = 'crasher'")]
+        db.close_pool()
+
+        deadline = time.time() + LEASE_SECONDS * 5 + 10
+        procs = [ctx.Process(target=_worker, args=(path, f"w{i}", deadline, out)) for i in range(workers)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        counts = collections.Counter(tid for _, ids in results for tid in ids)
+        db.configure(path)
+        with db.connection() as conn:
+            all_ids = {r[0] for r in conn.execute("SELECT id FROM tasks")}
+            pending = _pending(conn)
+        db.close_pool()
+
+    duplicates = [tid for tid, c in counts.items() if c > 1]
+    missing = all_ids - set(counts)
+    print(f"tasks: {tasks}, workers: {workers}, crashed worker held: {len(crashed_ids)}")
+    for name, ids in sorted(results):
+        print(f"  {name:>4}: {len(ids)} reminders")
+    print(f"reclaimed from crashed worker: {len(set(crashed_ids) & set(counts))}/{len(crashed_ids)}")
+    print(f"duplicates: {len(duplicates)}  missing: {len(missing)}  still pending: {pending}")
+    return 1 if duplicates or missing or pending else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+    sys.exit(run(args.workers, args.tasks))
+
+
+if __name__ == "__main__":
+    main()
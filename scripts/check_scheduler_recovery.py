@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check that the reminder scheduler survives a failing iteration.
+
+Runs ``ReminderScheduler`` against a stub task service whose
+``claim_due_tasks`` raises once (like ``database is locked``), right when
+the first reminder is due. The reminder popped by that failed iteration
+and one due later must both still be delivered.
+
+Exits non-zero if a reminder is never delivered or the loop dies.
+
+Usage:
+  python scripts/check_scheduler_recovery.py [--fail-on 2] [--timeout 5]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import db  # noqa: E402
+from scheduler import reminder_worker  # noqa: E402
+from scheduler.reminder_worker import ReminderScheduler  # noqa: E402
+
+
+class FlakyTaskService:
+    """In-memory stand-in for ``TaskService``; claim call ``fail_on`` raises."""
+
+    def __init__(self, due_dates, fail_on: int):
+        self.tasks = {
+            i: {"id": i, "user_id": 1, "title": f"task {i}", "description": "", "due_date": due}
+            for i, due in enumerate(due_dates, 1)
+        }
+        self.fail_on = fail_on
+        self.claims = 0
+        self.acked = {}
+
+    def pending_due_dates(self, until_ts: int):
+        return [{"id": t["id"], "due_at": t["due_date"]} for t in self.tasks.values()
+                if t["id"] not in self.acked and t["due_date"] <= until_ts]
+
+    def claim_due_tasks(self, owner: str, lease_seconds: int):
+        self.claims += 1
+        if self.claims == self.fail_on:
+            raise sqlite3.OperationalError("database is locked")
+        now = time.time()
+        return [t for t in self.tasks.values() if t["id"] not in self.acked and t["due_date"] <= now]
+
+    def ack_into_outbox(self, owner: str, reminders):
+        for task_id, user_id, payload in reminders:
+            self.acked[task_id] = time.time()
+        return []
+
+
+async def run(fail_on: int, timeout: float) -> bool:
+    now = time.time()
+    service = FlakyTaskService([now + 0.3, now + 0.8], fail_on)
+    scheduler = ReminderScheduler(service)
+    runner = asyncio.create_task(scheduler.run())
+
+    deadline = time.time() + timeout
+    while len(service.acked) < len(service.tasks) and time.time() < deadline and not runner.done():
+        await asyncio.sleep(0.05)
+    alive = not runner.done()
+    runner.cancel()
+
+    for task_id, task in service.tasks.items():
+        acked = service.acked.get(task_id)
+        late = f"{acked - task['due_date']:.2f}s late" if acked else "never delivered"
+        print(f"task {task_id}: {late}")
+    ok = alive and len(service.acked) == len(service.tasks)
+    print(f"claims={service.claims} (call {fail_on} raised), loop alive={alive}  {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fail-on", type=int, default=2, help="which claim_due_tasks call raises (1: the startup catch-up)")
+    parser.add_argument("--timeout", type=float, default=5)
+    args = parser.parse_args()
+
+    # the refill purges the outbox, so give it a database
+    db.configure(os.path.join(tempfile.mkdtemp(prefix="check-scheduler-"), "users.db"))
+    db.init_db()
+    reminder_worker.ERROR_BACKOFF_SECONDS = 0.1
+    sys.exit(0 if asyncio.run(run(args.fail_on, args.timeout)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,14 @@ from typing import Optional, Tuple
 from datetime import datetime, timedelta
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 import jwt
 import uuid
 
 # keep only authentication-related helpers
 from models import users_model
+from services.password_hasher import PasswordHasherBusy, password_hasher
+from utils.tracing import span
 
 load_dotenv()
 
@@ -65,25 +68,10 @@ def refresh_access_token(refresh_token: str) -> Optional[dict]:
     rec = verify_refresh_token(refresh_token)
     if rec is None:
         return None
-    user = users_model.find_user_by_id(rec["user_id"]) if hasattr(users_model, "find_user_by_id") else None
+    user = users_model.find_user_by_id(rec["user_id"])
     if user is None:
-        # fallback: query sqlite directly using users_model.DB_PATH
-        try:
-            import sqlite3
-
-            conn = sqlite3.connect(users_model.DB_PATH)
-            conn.row_factory = sqlite3.Row
-            cur = conn.cursor()
-            cur.execute("SELECT id, username, email FROM users WHERE id = ?", (rec["user_id"],))
-            row = cur.fetchone()
-            if row is None:
-                return None
-            user = {"id": row["id"], "username": row["username"], "email": row["email"]}
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+        return None
+    user = {"id": user["id"], "username": user["username"], "email": user["email"]}
     users_model.revoke_refresh_token(_hash_token(refresh_token))
     new_plain, _ = create_refresh_token(user["id"])
     access = create_access_token({"sub": user["username"], "id": user["id"]})
@@ -96,6 +84,11 @@ def revoke_refresh_token(plain_token: str) -> bool:
 
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
+    with span("auth"):
+        return _current_user(token)
+
+
+def _current_user(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -106,7 +99,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             raise HTTPException(status_code=401, detail="invalid_token")
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="invalid_token")
-    user = users_model.find_user(username)
+    user = users_model.get_principal(username)
     if user is None:
         raise HTTPException(status_code=401, detail="user_not_found")
     return user
@@ -121,6 +114,7 @@ def revoke_token(token: str) -> bool:
     exp = payload.get("exp")
     if jti is None or exp is None:
         return False
+    users_model.invalidate_principal(username=payload.get("sub"), user_id=payload.get("id"))
     try:
         exp_int = int(exp)
     except Exception:
@@ -128,28 +122,34 @@ def revoke_token(token: str) -> bool:
     return users_model.revoke_token(jti, exp_int)
 
 
-def _hash_password(password: str, salt: str) -> str:
-    return hashlib.sha256((salt + password).encode("utf-8")).hexdigest()
-
-
-def register_user(username: str, email: str, password: str) -> Optional[dict]:
-    existing = users_model.find_user(username)
+async def register_user(username: str, email: str, password: str) -> Optional[dict]:
+    existing = await run_in_threadpool(users_model.find_user, username)
     if existing is not None:
         return None
     salt = secrets.token_hex(16)
-    password_hash = _hash_password(password, salt)
-    user = users_model.add_user(username, email, password_hash, salt)
+    password_hash = await password_hasher.hash(password, salt)
+    user = await run_in_threadpool(users_model.add_user, username, email, password_hash, salt)
     return user
 
 
-def authenticate_user(username: str, password: str) -> Optional[dict]:
-    u = users_model.find_user(username)
+async def authenticate_user(username: str, password: str) -> Optional[dict]:
+    u = await run_in_threadpool(users_model.find_user, username)
     if u is None:
         return None
-    if _hash_password(password, u.get("salt", "")) == u.get("password_hash"):
-        return u
-    return None
+    stored = u.get("password_hash") or ""
+    if not await password_hasher.verify(password, u.get("salt", ""), stored):
+        return None
+    if password_hasher.needs_rehash(stored):
+        # upgrade legacy / weaker hashes transparently on successful login
+        try:
+            new_hash = await password_hasher.hash(password, u.get("salt", ""))
+            await run_in_threadpool(users_model.update_password_hash, u["id"], new_hash)
+            u["password_hash"] = new_hash
+        except PasswordHasherBusy:
+            pass
+    return u
 
 
 def revoke_refresh_for_user(user_id: int) -> int:
+    users_model.invalidate_principal(user_id=user_id)
     return users_model.revoke_all_refresh_tokens_for_user(user_id)
@@ -1,139 +1,188 @@
-import os
-from typing import Optional, Dict
-import requests
-import json
-import re
-from datetime import datetime, timedelta
-from typing import Optional, Dict
-import dateparser
-
-BULAN_ID = {
-    "januari": 1,
-    "februari": 2,
-    "maret": 3,
-    "april": 4,
-    "mei": 5,
-    "juni": 6,
-    "juli": 7,
-    "agustus": 8,
-    "september": 9,
-    "oktober": 10,
-    "november": 11,
-    "desember": 12,
-}
+import time
+import asyncio
+from typing import AsyncIterator, List, Optional, Dict
+
+from services.date_parser import parse_datetime
+from services.fast_path import local_responder
+from services.intent_service import intent_registry
+from services.llm_client import llm_client
+from services.llm_cache import llm_cache, make_key
+from services.conversation_service import conversation_store
+from utils.tracing import record, span
+
+
+def _detect_open_app_intents(text: str) -> List[Dict]:
+    return intent_registry.detect(text)
 
 
 def _detect_open_app_intent(text: str) -> Optional[Dict]:
-    t = text.lower()
-    # simple heuristics mapping
-    apps = {
-        "whatsapp": {"packages": ["com.whatsapp", "com.whatsapp.w4b"], "scheme": "whatsapp://send?text="},
-        "telegram": {"packages": ["org.telegram.messenger"], "scheme": "tg://msg?text="},
-        "chrome": {"packages": ["com.android.chrome"], "scheme": "googlechrome://"},
-        "browser": {"packages": ["com.android.browser"], "scheme": "http://"},
-        "instagram": {"packages": ["com.instagram.android"], "scheme": None },
-    }
-    for k, meta in apps.items():
-        if k in t:
-            packages = meta.get("packages") or []
-            scheme = meta.get("scheme")
-            # build Play Store and intent template candidates for Android clients
-            play_store = [f"https://play.google.com/store/apps/details?id={p}" for p in packages]
-            intent_templates = []
-            for p in packages:
-                # generic intent template with placeholders {text} and {package}
-                # Android intent format: intent://...#Intent;package={package};scheme={scheme_without_colons};end
-                scheme_name = None
-                if scheme and "://" in scheme:
-                    scheme_name = scheme.split("://")[0]
-                elif scheme:
-                    scheme_name = scheme.rstrip(":/")
-                if scheme_name:
-                    intent_templates.append(f"intent://send?text={{text}}#Intent;package={p};scheme={scheme_name};end")
-            return {
-                "type": "open_app",
-                "target": k,
-                "packages": packages,
-                "scheme": scheme,
-                "play_store": play_store,
-                "intent_templates": intent_templates,
-            }
-    return None
-
-# 
-def handle_chat(user: Dict, message: str) -> Dict:
+    intents = _detect_open_app_intents(text)
+    return intents[0] if intents else None
+
+
+LLM_PARAMS = {"temperature": 0.7, "max_tokens": 512}
+TASK_TRIGGER = "ingatkan saya"
+
+
+def _task_reply(username: str, task_data: Dict) -> str:
+    return (
+        f"Baik {username}, saya akan mengingatkan Anda pada "
+        f"{task_data['due_date'].strftime('%d %B %Y pukul %H:%M')}."
+    )
+
+
+def _fallback_reply(username: str, message: str) -> str:
+    low = message.strip().lower()
+    if low in ("hai", "halo", "hello"):
+        return f"Halo {username}, ada yang bisa saya bantu?"
+    return f"{username}, kamu bilang: {message}"
+
+
+def _build_messages(message: str, user_id: Optional[int] = None):
+    return [
+        {"role": "system", "content": "Kamu adalah asisten AI yang membantu percakapan umum."},
+        *conversation_store.context(user_id),
+        {"role": "user", "content": message}
+    ]
+
+def _cacheable(messages: List[Dict]) -> bool:
+    # only context-free prompts (system + user) repeat across users; with
+    # history every key is unique and would just churn the LRU and disk tier
+    return len(messages) == 2
+
+
+async def _task_tier(user: Dict, message: str) -> Optional[Dict]:
+    if TASK_TRIGGER not in message.lower():
+        return None
+    # parsing may fall back to dateparser (and its slow first import): keep it off the event loop
+    task_data = await asyncio.to_thread(extract_task_from_chat, message)
+    if not task_data:
+        return None
     username = user.get("username") if user else "Pengguna"
+    return {"type": "create_task", "task": task_data, "reply": _task_reply(username, task_data)}
 
-    # 1️⃣ PRIORITAS: TASK / REMINDER
-    task_data = extract_task_from_chat(message)
-    if task_data:
-        return {
-            "type": "create_task",
-            "task": task_data,
-            "reply": (
-                f"Baik {username}, saya akan mengingatkan Anda pada "
-                f"{task_data['due_date'].strftime('%d %B %Y pukul %H:%M')}."
-            )
-        }
 
-    # 2️⃣ INTENT OPEN APP
-    intent = _detect_open_app_intent(message)
+# 1️⃣ PRIORITAS: TASK / REMINDER, lalu sapaan, buka aplikasi, daftar tugas
+local_responder.register("task", _task_tier, first=True)
+
+
+async def handle_chat(user: Dict, message: str) -> Dict:
+    username = user.get("username") if user else "Pengguna"
+    user_id = user.get("id") if user else None
+    t0 = time.perf_counter()
+
+    # 1️⃣ JAWABAN LOKAL (tanpa LLM)
+    local = await local_responder.respond(user, message, t0)
+    if local is not None:
+        conversation_store.append(user_id, message, local["reply"])
+        return local
+
+    # 2️⃣ INTENT OPEN APP (disebut, tapi bukan perintah)
+    with span("intent"):
+        intents = _detect_open_app_intents(message)
+    intent = intents[0] if intents else None
 
     # 3️⃣ CHAT AI
-    cloud_resp = _call_openrouter_api(message)
+    with span("llm"):
+        cloud_resp = await _call_openrouter_api(message, user_id)
     if cloud_resp.get("reply"):
+        local_responder.stats.record("llm", time.perf_counter() - t0)
+        conversation_store.append(user_id, message, cloud_resp["reply"])
         return {
             "reply": cloud_resp["reply"],
-            "action": intent
+            "action": intent,
+            "actions": intents,
         }
 
     # 4️⃣ FALLBACK
-    low = message.strip().lower()
-    if low in ("hai", "halo", "hello"):
-        return {
-            "reply": f"Halo {username}, ada yang bisa saya bantu?",
-            "action": intent
-        }
-
+    reply = _fallback_reply(username, message)
+    local_responder.stats.record("fallback", time.perf_counter() - t0)
+    conversation_store.append(user_id, message, reply)
     return {
-        "reply": f"{username}, kamu bilang: {message}",
-        "action": intent
+        "reply": reply,
+        "action": intent,
+        "actions": intents,
     }
 
 
+async def stream_chat(user: Dict, message: str) -> AsyncIterator[Dict]:
+    """Streaming variant of ``handle_chat``.
+
+    Yields one ``meta`` event first (task extraction / open-app intent), then
+    ``delta`` events with reply fragments and a final ``done`` event carrying
+    the full reply. Local tiers answer with a single delta.
+    """
+    username = user.get("username") if user else "Pengguna"
+    user_id = user.get("id") if user else None
+    t0 = time.perf_counter()
+
+    local = await local_responder.respond(user, message, t0)
+    if local is not None:
+        conversation_store.append(user_id, message, local["reply"])
+        if local.get("type") == "create_task":
+            yield {"event": "meta", "type": "create_task", "task": local["task"], "action": None}
+        else:
+            yield {"event": "meta", "type": "chat", "tier": local["tier"], "action": local.get("action"), "actions": local.get("actions", [])}
+            yield {"event": "delta", "content": local["reply"]}
+        yield {"event": "done", "reply": local["reply"]}
+        return
+
+    with span("intent"):
+        intents = _detect_open_app_intents(message)
+    yield {"event": "meta", "type": "chat", "action": intents[0] if intents else None, "actions": intents}
+
+    parts = []
+    if llm_client.api_key():
+        messages = _build_messages(message, user_id)
+        key = make_key(llm_client.model(), messages, **LLM_PARAMS) if _cacheable(messages) else None
+        with span("llm.cache"):
+            cached = await llm_cache.get(key) if key else None
+        if cached is not None:
+            parts.append(cached)
+            yield {"event": "delta", "content": cached}
+        else:
+            t_llm = time.perf_counter()
+            try:
+                async for delta in llm_client.stream_chat(messages, **LLM_PARAMS):
+                    if not parts:
+                        record("llm.first_token", time.perf_counter() - t_llm)
+                    parts.append(delta)
+                    yield {"event": "delta", "content": delta}
+                if key:
+                    await llm_cache.set(key, "".join(parts))
+            except Exception as e:
+                print("[OPENROUTER STREAM ERROR]", e)
+            # includes time the client spent consuming each delta
+            record("llm", time.perf_counter() - t_llm)
+    else:
+        print("[OPENROUTER] API KEY TIDAK ADA")
 
-# 
+    reply = "".join(parts)
+    if not reply:
+        reply = _fallback_reply(username, message)
+        yield {"event": "delta", "content": reply}
+    local_responder.stats.record("llm" if parts else "fallback", time.perf_counter() - t0)
+    conversation_store.append(user_id, message, reply)
+    yield {"event": "done", "reply": reply}
 
 
-def _call_openrouter_api(message: str) -> Dict:
-    key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENROUTER_KEY")
-    if not key:
+async def _call_openrouter_api(message: str, user_id: Optional[int] = None) -> Dict:
+    if not llm_client.api_key():
         print("[OPENROUTER] API KEY TIDAK ADA")
         return {}
 
-    model = os.getenv("OPENROUTER_MODEL") or "deepseek/deepseek-r1-0528:free"
-    url = "https://api.openrouter.ai/v1/chat/completions"
-
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "Kamu adalah asisten AI yang membantu percakapan umum."},
-            {"role": "user", "content": message}
-        ],
-        "temperature": 0.7,
-        "max_tokens": 512,
-    }
+    messages = _build_messages(message, user_id)
 
-    headers = {
-        "Authorization": f"Bearer {key}",
-        "Content-Type": "application/json"
-    }
+    async def fetch() -> str:
+        data = await llm_client.chat(messages, **LLM_PARAMS)
+        return data["choices"][0]["message"]["content"]
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        return {"reply": data["choices"][0]["message"]["content"]}
+        if _cacheable(messages):
+            reply = await llm_cache.get_or_fetch(make_key(llm_client.model(), messages, **LLM_PARAMS), fetch)
+        else:
+            reply = await fetch()
+        return {"reply": reply}
     except Exception as e:
         print("[OPENROUTER ERROR]", e)
         return {}
@@ -144,61 +193,16 @@ def extract_task_from_chat(message: str):
 
     msg = message.lower()
 
-    if "ingatkan saya" not in msg:
+    if TASK_TRIGGER not in msg:
         return None
 
-    now = datetime.now()
-
-    # =====================
-    # 1. PARSE JAM MANUAL
-    # =====================
-    hour = None
-    minute = 0
-
-    jam_match = re.search(r"jam\s*(\d{1,2})(?:[:.](\d{1,2}))?", msg)
-    if jam_match:
-        hour = int(jam_match.group(1))
-        if jam_match.group(2):
-            minute = int(jam_match.group(2))
-
-        # malam / sore / pagi
-        if "malam" in msg or "sore" in msg:
-            if hour < 12:
-                hour += 12
-        elif "pagi" in msg:
-            if hour == 12:
-                hour = 0
-
-    if hour is None:
-        print("[TASK PARSER] JAM TIDAK DITEMUKAN")
+    # jam, tanggal & relatif ("2 jam lagi") via aturan; dateparser hanya fallback
+    with span("parse_date"):
+        due_date = parse_datetime(msg)
+    if due_date is None:
+        print("[TASK PARSER] JAM/TANGGAL TIDAK DITEMUKAN")
         return None
 
-    # =====================
-    # 2. PARSE TANGGAL
-    # =====================
-    if "hari ini" in msg:
-        date = now.date()
-    elif "besok" in msg:
-        date = (now + timedelta(days=1)).date()
-    else:
-        parsed = dateparser.parse(
-            msg,
-            languages=["id"],
-            settings={"PREFER_DATES_FROM": "future"},
-        )
-        if not parsed:
-            print("[TASK PARSER] TANGGAL GAGAL")
-            return None
-        date = parsed.date()
-
-    due_date = datetime(
-        year=date.year,
-        month=date.month,
-        day=date.day,
-        hour=hour,
-        minute=minute,
-    )
-
     print("[TASK PARSER] FINAL due_date:", due_date)
 
     return {
@@ -0,0 +1,157 @@
+import os
+import asyncio
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+Summarizer = Callable[[str, List[Dict]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return max(1, len(text) // 4)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return "…" + text[-(max_chars - 1):]
+
+
+async def extractive_summarizer(summary: str, turns: List[Dict]) -> str:
+    """Cheap local summarizer: keep the most recent text that fits."""
+    lines = [summary] if summary else []
+    lines += [f"{t['role']}: {t['content']}" for t in turns]
+    return "\n".join(lines)
+
+
+async def llm_summarizer(summary: str, turns: List[Dict]) -> str:
+    from services.llm_client import llm_client
+
+    if not llm_client.api_key():
+        return await extractive_summarizer(summary, turns)
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    messages = [
+        {"role": "system", "content": "Ringkas percakapan berikut secara singkat dalam bahasa Indonesia. Pertahankan fakta penting tentang pengguna."},
+        {"role": "user", "content": f"Ringkasan sebelumnya:\n{summary or '-'}\n\nPercakapan baru:\n{transcript}"},
+    ]
+    try:
+        data = await llm_client.chat(messages, temperature=0.2, max_tokens=256)
+        return data["choices"][0]["message"]["content"]
+    except Exception as e:
+        print("[MEMORY] summarization failed:", e)
+        return await extractive_summarizer(summary, turns)
+
+
+class Conversation:
+    __slots__ = ("turns", "window_tokens", "summary", "pending", "summarizing")
+
+    def __init__(self):
+        self.turns: Deque[Dict] = deque()
+        self.window_tokens = 0
+        self.summary = ""
+        self.pending: List[Dict] = []
+        self.summarizing = False
+
+
+class ConversationStore:
+    """Per-user sliding window of recent turns plus a running summary.
+
+    The window is bounded by ``window_tokens``; turns that fall out of it are
+    folded into the summary by a background task, never on the request path,
+    once at least ``summarize_batch_tokens`` of them have piled up (one
+    summarizer call per batch rather than per turn).
+    The number of tracked users is bounded by ``max_users`` (LRU).
+    """
+
+    def __init__(
+        self,
+        window_tokens: int = 1024,
+        summary_tokens: int = 256,
+        max_users: int = 10000,
+        summarizer: Optional[Summarizer] = None,
+        summarize_batch_tokens: int = 512,
+    ):
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.summarize_batch_tokens = summarize_batch_tokens
+        self.max_users = max_users
+        self.summarizer = summarizer or llm_summarizer
+        self._conversations: "OrderedDict[int, Conversation]" = OrderedDict()
+        self._tasks = set()
+
+    def _get(self, user_id: int) -> Conversation:
+        conv = self._conversations.get(user_id)
+        if conv is None:
+            conv = Conversation()
+            self._conversations[user_id] = conv
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+        else:
+            self._conversations.move_to_end(user_id)
+        return conv
+
+    def context(self, user_id: Optional[int]) -> List[Dict]:
+        """Messages to put between the system prompt and the new user message."""
+        if user_id is None or user_id not in self._conversations:
+            return []
+        conv = self._get(user_id)
+        messages = []
+        if conv.summary:
+            messages.append({"role": "system", "content": f"Ringkasan percakapan sebelumnya:\n{conv.summary}"})
+        messages.extend({"role": t["role"], "content": t["content"]} for t in conv.turns)
+        return messages
+
+    def append(self, user_id: Optional[int], message: str, reply: str):
+        if user_id is None:
+            return
+        conv = self._get(user_id)
+        for role, content in (("user", message), ("assistant", reply)):
+            tokens = estimate_tokens(content)
+            conv.turns.append({"role": role, "content": content, "tokens": tokens})
+            conv.window_tokens += tokens
+        while conv.window_tokens > self.window_tokens and len(conv.turns) > 2:
+            old = conv.turns.popleft()
+            conv.window_tokens -= old["tokens"]
+            conv.pending.append(old)
+        if conv.summarizing or not conv.pending:
+            return
+        if sum(t["tokens"] for t in conv.pending) >= self.summarize_batch_tokens:
+            self._schedule(conv)
+
+    def _schedule(self, conv: Conversation):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop (sync caller): summarize on the next async append
+        conv.summarizing = True
+        task = loop.create_task(self._summarize(conv))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, conv: Conversation):
+        try:
+            while conv.pending:
+                batch, conv.pending = conv.pending, []
+                summary = await self.summarizer(conv.summary, batch)
+                conv.summary = _clip(summary, self.summary_tokens)
+        except Exception as e:
+            print("[MEMORY] summarizer error:", e)
+        finally:
+            conv.summarizing = False
+
+    async def drain(self):
+        """Wait for background summarization (shutdown, benchmarks)."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def clear(self, user_id: int):
+        self._conversations.pop(user_id, None)
+
+
+conversation_store = ConversationStore(
+    window_tokens=int(os.getenv("CHAT_HISTORY_TOKENS", "1024")),
+    summary_tokens=int(os.getenv("CHAT_SUMMARY_TOKENS", "256")),
+    max_users=int(os.getenv("CHAT_HISTORY_USERS", "10000")),
+    summarize_batch_tokens=int(os.getenv("CHAT_SUMMARY_BATCH_TOKENS", "512")),
+)
@@ -0,0 +1,243 @@
+"""Rule-based parser for Indonesian reminder dates and times.
+
+Handles the expressions people actually type into the chat, with a handful
+of precompiled regexes:
+
+- dates: "hari ini", "besok", "lusa", "3 hari lagi", "2 minggu lagi",
+  "senin", "senin depan", "minggu depan", "tanggal 5", "tanggal 5 bulan
+  depan", "5 maret", "tanggal 5 Maret 2027", "tanggal 5/3", "5/3/2027",
+  "2027-03-05" (a bare "5/3" is not a date: "ruang 3/4")
+- times: "jam 7", "pukul 19.30", "jam 7.5" (07:05), "jam setengah 8",
+  "jam 7 malam", "besok pagi" (period words alone map to a default hour)
+- relative: "30 menit lagi", "2 jam lagi", "setengah jam lagi",
+  "2 jam 30 menit lagi", "1 jam setengah lagi"
+
+When the rules find a time but no date, ``dateparser`` gets a try (imported
+lazily); failing that the time is taken as today, or tomorrow if it has
+already passed. Dates without a year prefer the future.
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+BULAN_ID = {
+    "januari": 1,
+    "februari": 2,
+    "maret": 3,
+    "april": 4,
+    "mei": 5,
+    "juni": 6,
+    "juli": 7,
+    "agustus": 8,
+    "september": 9,
+    "oktober": 10,
+    "november": 11,
+    "desember": 12,
+}
+
+_MONTHS = dict(BULAN_ID)
+_MONTHS.update({
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7,
+    "agu": 8, "agt": 8, "ags": 8, "sep": 9, "sept": 9, "okt": 10, "nov": 11, "des": 12,
+})
+
+HARI_ID = {"senin": 0, "selasa": 1, "rabu": 2, "kamis": 3, "jumat": 4, "jum'at": 4, "sabtu": 5, "minggu": 6}
+
+_NUMBERS = {"se": 1, "satu": 1, "dua": 2, "tiga": 3, "empat": 4, "lima": 5, "enam": 6, "tujuh": 7, "delapan": 8, "sembilan": 9, "sepuluh": 10}
+
+# default hour when only a part of day is given ("besok pagi")
+PERIOD_HOURS = {"pagi": 7, "siang": 12, "sore": 16, "malam": 19}
+
+_month_alt = "|".join(sorted(map(re.escape, _MONTHS), key=len, reverse=True))
+_num_alt = r"\d+|" + "|".join(sorted(_NUMBERS, key=len, reverse=True))
+
+_ISO_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NAMED_RE = re.compile(rf"\b(?:tanggal\s+|tgl\.?\s*)?(\d{{1,2}})\s+({_month_alt})\b\.?(?:\s+(\d{{4}}))?")
+# d/m only with "tanggal"/"tgl" in front or a year behind; "ruang 3/4" is not a date
+_NUMERIC_RE = re.compile(r"\b(?:(?:tanggal|tgl\.?)\s*(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?|(\d{1,2})/(\d{1,2})/(\d{2,4}))\b")
+_TANGGAL_RE = re.compile(r"\b(?:tanggal|tgl\.?)\s*(\d{1,2})\b(\s+bulan\s+depan)?")
+_REL_DAYS_RE = re.compile(rf"\b({_num_alt})\s*(hari|minggu|bulan)\s+(?:lagi|kemudian|ke\s+depan)\b")
+# "2 jam 30 menit lagi", "1 jam setengah lagi", "satu setengah jam lagi", "30 menit lagi"
+_REL_TIME_RE = re.compile(
+    rf"\b(?:({_num_alt}|setengah)(\s+setengah)?\s*jam(\s+setengah)?(?:\s+(?:dan\s+)?({_num_alt})\s*menit)?"
+    rf"|({_num_alt})\s*menit)\s+lagi\b"
+)
+_KEYWORD_RE = re.compile(r"\b(hari\s+ini|besok\s+lusa|besok|lusa)\b")
+_WEEKDAY_RE = re.compile(r"\b(hari\s+)?(senin|selasa|rabu|kamis|jum'?at|sabtu|minggu)\b(?:\s+(depan|ini))?")
+_TIME_RE = re.compile(r"\b(?:jam|pukul|pkl\.?)\s*(setengah\s+)?(\d{1,2})(?:[:.](\d{1,2}))?\b(?:\s*(pagi|siang|sore|malam))?")
+_CLOCK_RE = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+_PERIOD_RE = re.compile(r"\b(pagi|siang|sore|malam)\b")
+
+
+def _number(word: str) -> int:
+    return int(word) if word.isdigit() else _NUMBERS[word]
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    year, month = d.year + month // 12, month % 12 + 1
+    for day in (d.day, 30, 29, 28):
+        result = _safe_date(year, month, day)
+        if result:
+            return result
+    return d
+
+
+def _future(year: Optional[int], month: int, day: int, today: date) -> Optional[date]:
+    if year is not None:
+        return _safe_date(year, month, day)
+    d = _safe_date(today.year, month, day)
+    if d is not None and d < today:
+        d = _safe_date(today.year + 1, month, day)
+    return d
+
+
+def _apply_period(hour: int, period: Optional[str]) -> int:
+    if period == "pagi" and hour == 12:
+        return 0
+    if period == "siang" and 1 <= hour <= 5:
+        return hour + 12
+    if period == "sore" and hour < 12:
+        return hour + 12
+    if period == "malam":
+        if hour == 12:
+            return 0
+        if 5 <= hour < 12:
+            return hour + 12
+    return hour
+
+
+def parse_time(text: str) -> Optional[Tuple[int, int]]:
+    """``(hour, minute)`` from "jam 7 malam", "pukul 19.30", "19:30" or a bare "pagi"."""
+    m = _TIME_RE.search(text)
+    if m:
+        half, hour, minute = m.group(1), int(m.group(2)), int(m.group(3) or 0)
+        if half:
+            hour, minute = hour - 1, 30
+        period = m.group(4)
+        if period is None:
+            p = _PERIOD_RE.search(text)
+            period = p.group(1) if p else None
+        hour = _apply_period(hour, period)
+    else:
+        m = _CLOCK_RE.search(text)
+        if m:
+            hour, minute = int(m.group(1)), int(m.group(2))
+        else:
+            p = _PERIOD_RE.search(text)
+            if not p:
+                return None
+            hour, minute = PERIOD_HOURS[p.group(1)], 0
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return hour, minute
+
+
+def parse_date(text: str, today: date) -> Optional[date]:
+    """Calendar date from the rules above, or None if nothing matched."""
+    m = _ISO_RE.search(text)
+    if m:
+        return _safe_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    m = _NAMED_RE.search(text)
+    if m:
+        year = int(m.group(3)) if m.group(3) else None
+        return _future(year, _MONTHS[m.group(2)], int(m.group(1)), today)
+    m = _NUMERIC_RE.search(text)
+    if m:
+        day, month, year = m.group(1, 2, 3) if m.group(1) else m.group(4, 5, 6)
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+        return _future(year, int(month), int(day), today)
+    m = _TANGGAL_RE.search(text)
+    if m:
+        day = int(m.group(1))
+        if m.group(2):
+            nxt = _add_months(today.replace(day=1), 1)
+            return _safe_date(nxt.year, nxt.month, day)
+        d = _safe_date(today.year, today.month, day)
+        if d is None or d < today:
+            nxt = _add_months(today.replace(day=1), 1)
+            d = _safe_date(nxt.year, nxt.month, day)
+        return d
+
+    m = _KEYWORD_RE.search(text)
+    if m:
+        word = " ".join(m.group(1).split())
+        return today + timedelta(days={"hari ini": 0, "besok": 1, "lusa": 2, "besok lusa": 2}[word])
+
+    m = _REL_DAYS_RE.search(text)
+    if m:
+        n, unit = _number(m.group(1)), m.group(2)
+        if unit == "bulan":
+            return _add_months(today, n)
+        return today + timedelta(days=n * (7 if unit == "minggu" else 1))
+
+    m = _WEEKDAY_RE.search(text)
+    if m:
+        has_hari, name, suffix = m.group(1), m.group(2), m.group(3)
+        if name == "minggu" and not has_hari and suffix == "depan":
+            return today + timedelta(days=7)  # "minggu depan" = next week
+        weekday = HARI_ID[name.replace("'", "")]
+        ahead = (weekday - today.weekday()) % 7
+        if suffix == "depan":
+            # that day in next week (weeks start on Monday)
+            ahead = 7 - today.weekday() + weekday
+        elif ahead == 0 and suffix != "ini":
+            ahead = 7
+        return today + timedelta(days=ahead)
+    return None
+
+
+def parse_relative(text: str, now: datetime) -> Optional[datetime]:
+    """"30 menit lagi" / "2 jam lagi" / "2 jam 30 menit lagi" / "1 jam setengah lagi"."""
+    m = _REL_TIME_RE.search(text)
+    if not m:
+        return None
+    hours, half_before, half_after, minutes, only_minutes = m.groups()
+    if only_minutes:
+        return now + timedelta(minutes=_number(only_minutes))
+    h = 0.5 if hours == "setengah" else _number(hours)
+    if half_before or half_after:
+        h += 0.5
+    return now + timedelta(hours=h, minutes=_number(minutes) if minutes else 0)
+
+
+def dateparser_date(text: str) -> Optional[date]:
+    """Slow path: let ``dateparser`` try the whole message (lazy import)."""
+    try:
+        import dateparser
+    except ImportError:
+        return None
+    parsed = dateparser.parse(text, languages=["id"], settings={"PREFER_DATES_FROM": "future"})
+    return parsed.date() if parsed else None
+
+
+def parse_datetime(text: str, now: Optional[datetime] = None, fallback: bool = True) -> Optional[datetime]:
+    """Due datetime for a reminder message (lower-cased), or None.
+
+    A time of day is required unless the expression is relative
+    ("2 jam lagi"); the date comes from the rules, then from ``dateparser``
+    when ``fallback`` is set, and otherwise is the next occurrence of that
+    time (today, or tomorrow if it has passed).
+    """
+    now = now or datetime.now()
+    rel = parse_relative(text, now)
+    if rel is not None:
+        return rel.replace(microsecond=0)
+    hm = parse_time(text)
+    if hm is None:
+        return None
+    day = parse_date(text, now.date())
+    if day is None and fallback:
+        day = dateparser_date(text)
+    if day is None:
+        due = now.replace(hour=hm[0], minute=hm[1], second=0, microsecond=0)
+        return due if due > now else due + timedelta(days=1)
+    return datetime(day.year, day.month, day.day, hm[0], hm[1])
@@ -0,0 +1,127 @@
+"""Tiered chat pipeline: cheap local answers before the LLM.
+
+Each tier is an async handler ``fn(user, message) -> Optional[dict]``; the
+first one that returns a result answers the message and the LLM is never
+called. ``chat_service`` registers the reminder-creation tier in front of
+the built-in ones (greeting, open-app command, task list); whatever falls
+through goes to the LLM and finally the canned fallback.
+
+Hit counts and latency are tracked per tier, including "llm" and
+"fallback", so the share of traffic that skips the LLM is visible.
+"""
+import re
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.intent_service import intent_registry
+from services.task_service import TaskService
+from utils.tracing import span
+
+Handler = Callable[[Dict, str], Awaitable[Optional[Dict]]]
+
+_GREETING_RE = re.compile(
+    r"^\s*(hai+|halo+|hallo+|hello+|hi+|hey+|helo+|assalamu'?alaikum|selamat\s+(pagi|siang|sore|malam))"
+    r"(\s+(kak|bro|sis|min|bot|asisten))?\s*[!.?]*\s*$"
+)
+_OPEN_APP_RE = re.compile(r"^\s*(tolong\s+|coba\s+|please\s+)?(buka|bukain|bukakan|jalankan|open|launch)\b")
+_TASK_LIST_RE = re.compile(
+    r"\b(apa\s+(saja\s+)?|daftar\s+|lihat\s+|cek\s+|tampilkan\s+)"
+    r"(tugas|task|pengingat|reminder|jadwal)(ku|\s+(saya|aku|gue|gw))?\b"
+)
+
+_BULAN_SINGKAT = ["Jan", "Feb", "Mar", "Apr", "Mei", "Jun", "Jul", "Agu", "Sep", "Okt", "Nov", "Des"]
+
+
+class TierStats:
+    def __init__(self):
+        self._tiers: Dict[str, Dict] = {}
+        self.total = 0
+
+    def record(self, tier: str, seconds: float):
+        self.total += 1
+        s = self._tiers.setdefault(tier, {"hits": 0, "total_ms": 0.0, "max_ms": 0.0})
+        ms = seconds * 1000
+        s["hits"] += 1
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+
+    def snapshot(self) -> Dict:
+        tiers = {}
+        for name, s in self._tiers.items():
+            tiers[name] = {
+                "hits": s["hits"],
+                "hit_rate": round(s["hits"] / self.total, 4) if self.total else 0.0,
+                "avg_ms": round(s["total_ms"] / s["hits"], 3),
+                "max_ms": round(s["max_ms"], 3),
+            }
+        return {"requests": self.total, "tiers": tiers}
+
+
+class LocalResponder:
+    def __init__(self):
+        self.tiers: List[Tuple[str, Handler]] = []
+        self.stats = TierStats()
+
+    def register(self, name: str, handler: Handler, first: bool = False):
+        if first:
+            self.tiers.insert(0, (name, handler))
+        else:
+            self.tiers.append((name, handler))
+
+    async def respond(self, user: Dict, message: str, t0: float) -> Optional[Dict]:
+        """Run the local tiers in order; the hit is recorded against its tier."""
+        for name, handler in self.tiers:
+            with span(f"tier.{name}"):
+                result = await handler(user, message)
+            if result is not None:
+                result["tier"] = name
+                self.stats.record(name, time.perf_counter() - t0)
+                return result
+        return None
+
+
+def _username(user: Optional[Dict]) -> str:
+    return user.get("username") if user else "Pengguna"
+
+
+async def greeting_tier(user: Dict, message: str) -> Optional[Dict]:
+    if not _GREETING_RE.match(message.lower()):
+        return None
+    return {"reply": f"Halo {_username(user)}, ada yang bisa saya bantu?", "action": None, "actions": []}
+
+
+async def open_app_tier(user: Dict, message: str) -> Optional[Dict]:
+    # only plain commands ("buka whatsapp"); questions that merely mention an app go to the LLM
+    if not _OPEN_APP_RE.match(message.lower()):
+        return None
+    intents = intent_registry.detect(message)
+    if not intents:
+        return None
+    names = " dan ".join(i["label"] for i in intents)
+    return {"reply": f"Baik {_username(user)}, membuka {names}.", "action": intents[0], "actions": intents}
+
+
+_task_service = TaskService()
+
+
+def _format_due(due) -> str:
+    return f"{due.day} {_BULAN_SINGKAT[due.month - 1]} {due.strftime('%H:%M')}"
+
+
+async def task_list_tier(user: Dict, message: str) -> Optional[Dict]:
+    if not user or not _TASK_LIST_RE.search(message.lower()):
+        return None
+    tasks = await asyncio.to_thread(_task_service.upcoming_tasks, user["id"], 5)
+    name = _username(user)
+    if not tasks:
+        return {"reply": f"{name}, kamu belum punya pengingat yang akan datang.", "action": None, "actions": []}
+    lines = [f"- {_format_due(t['due_date'])}: {(t['description'] or t['title'])[:80]}" for t in tasks]
+    reply = f"{name}, ini pengingat terdekatmu:\n" + "\n".join(lines)
+    return {"reply": reply, "action": None, "actions": []}
+
+
+local_responder = LocalResponder()
+local_responder.register("greeting", greeting_tier)
+local_responder.register("open_app", open_app_tier)
+local_responder.register("task_list", task_list_tier)
@@ -0,0 +1,127 @@
+"""Open-app intent registry.
+
+Apps are described in ``config/intents.json`` (``INTENTS_CONFIG`` to point
+elsewhere) and compiled once into a word-level trie: every alias is split
+into words, and matching walks the trie from each word of the message. An
+alias therefore only matches whole words ("browser" never fires inside
+"browsers"), except that the last word may carry an Indonesian enclitic
+("whatsappnya", "instagramku", "browserlah"). Every occurrence is reported
+with its character span, and the
+cost per message depends on the message length, not on how many apps are
+registered.
+
+The Play Store links and Android intent templates are derived per app once,
+at load time.
+"""
+import os
+import re
+import json
+from typing import Dict, List, Optional
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "intents.json")
+
+_WORD_RE = re.compile(r"\w+")
+_END = object()  # terminal marker; can never collide with a word key
+_ENCLITICS = ("nya", "lah", "pun", "ku", "mu")
+
+
+def _terminal(node: Dict, word: str) -> Optional[str]:
+    """Target of an alias ending in ``word`` minus an enclitic ("browsernya")."""
+    if not word.endswith(_ENCLITICS):
+        return None
+    for suffix in _ENCLITICS:
+        if word.endswith(suffix):
+            child = node.get(word[:-len(suffix)])
+            if child is not None and _END in child:
+                return child[_END]
+    return None
+
+
+def _templates(packages: List[str], scheme: Optional[str]) -> List[str]:
+    # generic intent template with placeholders {text} and {package}
+    # Android intent format: intent://...#Intent;package={package};scheme={scheme_without_colons};end
+    scheme_name = None
+    if scheme and "://" in scheme:
+        scheme_name = scheme.split("://")[0]
+    elif scheme:
+        scheme_name = scheme.rstrip(":/")
+    if not scheme_name:
+        return []
+    return [f"intent://send?text={{text}}#Intent;package={p};scheme={scheme_name};end" for p in packages]
+
+
+class IntentRegistry:
+    def __init__(self, apps: Dict[str, Dict]):
+        self.apps: Dict[str, Dict] = {}
+        self._trie: Dict = {}
+        for target, meta in apps.items():
+            packages = list(meta.get("packages") or [])
+            scheme = meta.get("scheme")
+            self.apps[target] = {
+                "type": "open_app",
+                "target": target,
+                "label": meta.get("label") or target.capitalize(),
+                "packages": packages,
+                "scheme": scheme,
+                "play_store": [f"https://play.google.com/store/apps/details?id={p}" for p in packages],
+                "intent_templates": _templates(packages, scheme),
+            }
+            for alias in meta.get("aliases") or [target]:
+                self._add(alias, target)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "IntentRegistry":
+        path = path or os.getenv("INTENTS_CONFIG") or DEFAULT_CONFIG
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f).get("apps", {}))
+
+    def _add(self, alias: str, target: str):
+        node = self._trie
+        for word in _WORD_RE.findall(alias.lower()):
+            node = node.setdefault(word, {})
+        node[_END] = target
+
+    def match(self, text: str) -> List[Dict]:
+        """Every alias occurrence as ``{"target", "start", "end"}``, in text order.
+
+        Overlapping aliases starting at the same word resolve to the longest.
+        Enclitics are only stripped when the exact word doesn't continue an alias.
+        """
+        words = [(m.group(0), m.start(), m.end()) for m in _WORD_RE.finditer(text.lower())]
+        matches = []
+        i = 0
+        while i < len(words):
+            node, best, j = self._trie, None, i
+            while j < len(words):
+                word = words[j][0]
+                if word not in node:
+                    target = _terminal(node, word)
+                    if target is not None:
+                        best = (target, j + 1)
+                    break
+                node = node[word]
+                j += 1
+                if _END in node:
+                    best = (node[_END], j)
+            if best is None:
+                i += 1
+                continue
+            target, j = best
+            matches.append({"target": target, "start": words[i][1], "end": words[j - 1][2]})
+            i = j
+        return matches
+
+    def detect(self, text: str) -> List[Dict]:
+        """Open-app intents for every distinct app mentioned, first mention first."""
+        intents, seen = [], set()
+        for m in self.match(text):
+            if m["target"] in seen:
+                continue
+            seen.add(m["target"])
+            intent = dict(self.apps[m["target"]])
+            intent["span"] = [m["start"], m["end"]]
+            intents.append(intent)
+        return intents
+
+
+intent_registry = IntentRegistry.from_file()
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.cache import TTLCache
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def make_key(model: str, messages: List[Dict], **params) -> str:
+    """Stable cache key for a completion request."""
+    body = {
+        "model": model,
+        "messages": [{"role": m["role"], "content": normalize_text(m["content"])} for m in messages],
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Optional SQLite tier so cached replies survive restarts.
+
+    Writes don't clean up: an approximate row count is kept in memory, and
+    expired rows are purged every ``purge_every`` writes, or sooner when the
+    count passes ``maxsize``, in which case the oldest rows go too, down to
+    90% of ``maxsize`` so the next trim is that many writes away.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0, maxsize: int = 50000, purge_every: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.purge_every = purge_every
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache (expires_at)")
+        self._conn.commit()
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            # counts replaced keys too, so it only ever over-estimates
+            self._rows += 1
+            self._writes += 1
+            if self._rows > self.maxsize or self._writes >= self.purge_every:
+                self._trim()
+            self._conn.commit()
+
+    def _trim(self):
+        # caller holds self._lock
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if self._rows > self.maxsize:
+            # keep the newest entries (oldest expiry goes first: same ttl for every row)
+            keep = self.maxsize * 9 // 10
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE expires_at <= (
+                    SELECT expires_at FROM llm_cache ORDER BY expires_at DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (keep,),
+            )
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self._writes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight call.
+
+    The call runs in its own task and every caller (the first one included)
+    awaits it through ``asyncio.shield``: a caller that is cancelled, e.g.
+    a client disconnecting, only stops waiting; the others still get the
+    result.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has gone
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+class LLMResponseCache:
+    """Memory (LRU + TTL) -> optional disk tier -> single-flight upstream call."""
+
+    def __init__(self, memory: TTLCache, disk: Optional[DiskCache] = None, enabled: bool = True):
+        self.memory = memory
+        self.disk = disk
+        self.enabled = enabled
+        self.flight = SingleFlight()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        return None
+
+    async def set(self, key: str, value: str):
+        if not self.enabled or not value:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+        if not self.enabled:
+            return await fetch()
+
+        async def _miss():
+            self.misses += 1
+            value = await fetch()
+            await self.set(key, value)
+            return value
+
+        return await self.flight.do(key, _miss)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "deduplicated": self.flight.shared,
+            "in_flight": len(self.flight),
+            "evictions": self.memory.evictions,
+            "size": len(self.memory),
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_default() -> LLMResponseCache:
+    memory = TTLCache(
+        maxsize=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "600")),
+    )
+    disk = None
+    disk_path = os.getenv("LLM_CACHE_DB")
+    if disk_path:
+        disk = DiskCache(disk_path, ttl=float(os.getenv("LLM_CACHE_DISK_TTL", "86400")))
+    enabled = os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+    return LLMResponseCache(memory, disk, enabled=enabled)
+
+
+llm_cache = _build_default()
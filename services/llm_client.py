@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from utils.metrics import LLM_ERRORS, LLM_REQUEST_SECONDS
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_URL = "https://api.openrouter.ai/v1/chat/completions"
+DEFAULT_MODEL = "deepseek/deepseek-r1-0528:free"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class OpenRouterClient:
+    """Async OpenRouter client backed by one keep-alive connection pool.
+
+    The underlying ``httpx.AsyncClient`` is created lazily on first use (or by
+    ``warm_up``) and reused for every request, so only the first call pays
+    the TCP + TLS handshake. ``httpx`` itself is imported at that point too,
+    keeping it off the worker's import path.
+    """
+
+    def __init__(self):
+        self.url = os.getenv("OPENROUTER_URL") or DEFAULT_URL
+        self.timeouts = {
+            "connect": _env_float("OPENROUTER_CONNECT_TIMEOUT", 5.0),
+            "read": _env_float("OPENROUTER_READ_TIMEOUT", 30.0),
+            "write": _env_float("OPENROUTER_WRITE_TIMEOUT", 10.0),
+            "pool": _env_float("OPENROUTER_POOL_TIMEOUT", 5.0),
+        }
+        self.limits = {
+            "max_connections": int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "100")),
+            "max_keepalive_connections": int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "20")),
+            "keepalive_expiry": _env_float("OPENROUTER_KEEPALIVE_EXPIRY", 60.0),
+        }
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def api_key() -> Optional[str]:
+        return os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENROUTER_KEY")
+
+    @staticmethod
+    def model() -> str:
+        return os.getenv("OPENROUTER_MODEL") or DEFAULT_MODEL
+
+    async def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    import httpx
+
+                    self._client = httpx.AsyncClient(
+                        timeout=httpx.Timeout(**self.timeouts),
+                        limits=httpx.Limits(**self.limits),
+                    )
+        return self._client
+
+    def _headers(self, key: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        }
+
+    async def warm_up(self) -> bool:
+        """Open a pooled connection to OpenRouter ahead of the first chat."""
+        client = await self._get_client()
+        try:
+            await client.head(self.url)
+            return True
+        except Exception as e:
+            print("[OPENROUTER] warm-up failed:", e)
+            return False
+
+    def _payload(self, messages: List[Dict], temperature: float, max_tokens: int, stream: bool = False) -> Dict:
+        key = self.api_key()
+        if not key:
+            raise RuntimeError("OPENROUTER_API_KEY is not set")
+        payload = {
+            "model": self.model(),
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def chat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 512) -> Dict:
+        """Return the raw completion JSON. Raises ``httpx.HTTPError`` on failure."""
+        payload = self._payload(messages, temperature, max_tokens)
+        client = await self._get_client()
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post(self.url, headers=self._headers(self.api_key()), json=payload)
+            resp.raise_for_status()
+            return resp.json()
+        except Exception:
+            LLM_ERRORS.labels("chat").inc()
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.labels("chat").observe(time.perf_counter() - t0)
+
+    async def stream_chat(self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 512) -> AsyncIterator[str]:
+        """Yield content deltas from OpenRouter's SSE stream as they arrive."""
+        payload = self._payload(messages, temperature, max_tokens, stream=True)
+        client = await self._get_client()
+        t0 = time.perf_counter()
+        try:
+            async with client.stream("POST", self.url, headers=self._headers(self.api_key()), json=payload) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    # SSE comments (": OPENROUTER PROCESSING") and blank separators
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        continue
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        except Exception:
+            LLM_ERRORS.labels("stream").inc()
+            raise
+        finally:
+            # whole stream, request to [DONE] (or the caller stopping early)
+            LLM_REQUEST_SECONDS.labels("stream").observe(time.perf_counter() - t0)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+llm_client = OpenRouterClient()
@@ -0,0 +1,127 @@
+"""Password hashing off the request path.
+
+Hashes are computed with scrypt or PBKDF2 (both stdlib) on a small
+dedicated thread pool; ``hashlib`` releases the GIL while it works, so the
+event loop and the regular request threadpool stay responsive during a
+login storm. At most ``max_pending`` hashes may be queued or running; past
+that, ``PasswordHasherBusy`` is raised and the route answers 503.
+
+Stored format (the per-user salt stays in ``users.salt``):
+
+- ``scrypt$<n>$<r>$<p>$<hex>``
+- ``pbkdf2_sha256$<iterations>$<hex>``
+- bare 64-char hex -- legacy ``sha256(salt + password)``, rehashed on login
+"""
+import os
+import hmac
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        algorithm: str = "scrypt",
+        scrypt_n: int = 2 ** 14,
+        scrypt_r: int = 8,
+        scrypt_p: int = 1,
+        pbkdf2_iterations: int = 600000,
+        workers: int = 2,
+        max_pending: int = 64,
+    ):
+        if algorithm not in ("scrypt", "pbkdf2_sha256"):
+            raise ValueError(f"unsupported password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    # --- sync primitives (run on the pool) ---------------------------------
+
+    def encode(self, password: str, salt: str) -> str:
+        pw, s = password.encode("utf-8"), salt.encode("utf-8")
+        if self.algorithm == "scrypt":
+            n, r, p = self.scrypt_n, self.scrypt_r, self.scrypt_p
+            digest = hashlib.scrypt(pw, salt=s, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+            return f"scrypt${n}${r}${p}${digest.hex()}"
+        digest = hashlib.pbkdf2_hmac("sha256", pw, s, self.pbkdf2_iterations)
+        return f"pbkdf2_sha256${self.pbkdf2_iterations}${digest.hex()}"
+
+    def check(self, password: str, salt: str, stored: str) -> bool:
+        pw, s = password.encode("utf-8"), salt.encode("utf-8")
+        parts = stored.split("$")
+        if parts[0] == "scrypt" and len(parts) == 5:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = hashlib.scrypt(pw, salt=s, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 3:
+            digest = hashlib.pbkdf2_hmac("sha256", pw, s, int(parts[1]))
+        elif len(parts) == 1:
+            digest = hashlib.sha256(s + pw).digest()
+        else:
+            return False
+        return hmac.compare_digest(digest.hex(), parts[-1])
+
+    def needs_rehash(self, stored: str) -> bool:
+        """True when ``stored`` was made with another algorithm or weaker parameters."""
+        parts = stored.split("$")
+        if self.algorithm == "scrypt":
+            return parts[:4] != ["scrypt", str(self.scrypt_n), str(self.scrypt_r), str(self.scrypt_p)]
+        return parts[:2] != ["pbkdf2_sha256", str(self.pbkdf2_iterations)]
+
+    # --- async API -----------------------------------------------------------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwhash")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str, salt: str) -> str:
+        return await self._run(self.encode, password, salt)
+
+    async def verify(self, password: str, salt: str, stored: str) -> bool:
+        return await self._run(self.check, password, salt, stored)
+
+    def stats(self):
+        return {"algorithm": self.algorithm, "workers": self.workers, "pending": self._pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    algorithm=os.getenv("PASSWORD_HASH_ALGORITHM", "scrypt"),
+    scrypt_n=int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14))),
+    scrypt_r=int(os.getenv("PASSWORD_SCRYPT_R", "8")),
+    scrypt_p=int(os.getenv("PASSWORD_SCRYPT_P", "1")),
+    pbkdf2_iterations=int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000")),
+    workers=int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")),
+)
@@ -1,20 +1,77 @@
+import os
+import json
 import time
-from datetime import datetime
+import uuid
+import base64
+import socket
 import sqlite3
-import os
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from models import db
+from models import outbox_model
+from utils.metrics import DB_QUERY_SECONDS, timed
+
+# identifies this process when leasing reminders (see claim_due_tasks)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "60"))
+
+# callables ``fn(task_id, due_ts)`` notified after every insert (reminder scheduler);
+# a bulk insert notifies once with ``task_id=None`` and the earliest due time
+_task_listeners = []
+
+
+def add_task_listener(fn):
+    _task_listeners.append(fn)
+
+
+def remove_task_listener(fn):
+    if fn in _task_listeners:
+        _task_listeners.remove(fn)
+
+
+def _notify_created(task_id: int, due_ts: int):
+    for fn in list(_task_listeners):
+        try:
+            fn(task_id, due_ts)
+        except Exception as e:
+            print("[TASK] listener error:", e)
+
+
+# columns a client may ask for in ``get_tasks(fields=...)``
+TASK_FIELDS = ("id", "title", "description", "due_date", "created_at", "is_completed", "is_notified")
+MAX_PAGE_SIZE = 200
+
+
+def _bump_versions(conn: sqlite3.Connection, user_ids: Iterable[int]):
+    """Advance the list version of every user whose tasks changed (caller commits)."""
+    conn.executemany(
+        """
+        INSERT INTO task_versions (user_id, version) VALUES (?, 1)
+        ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+        """,
+        [(uid,) for uid in set(user_ids)]
+    )
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "../models/users.db")
 
-def _get_conn():
-    conn = sqlite3.connect(DB_PATH, timeout=5)
-    conn.row_factory = sqlite3.Row
-    return conn
+def encode_cursor(due_date: int, task_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([due_date, task_id]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        due_date, task_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(due_date), int(task_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
 
 class TaskService:
 
+    @timed(DB_QUERY_SECONDS, "tasks.create_task")
     def create_task(self, task, user_id: int):
-        conn = _get_conn()
-        try:
+        due_ts = int(task.due_date.timestamp())
+        with db.connection() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -26,43 +83,273 @@ class TaskService:
                     user_id,
                     task.title,
                     task.description,
-                    int(task.due_date.timestamp()),
+                    due_ts,
                     int(time.time())
                 )
             )
+            _bump_versions(conn, [user_id])
             conn.commit()
+            _notify_created(cur.lastrowid, due_ts)
             return {
                 "message": "Task created",
                 "task_id": cur.lastrowid
             }
-        finally:
-            conn.close()
 
-    def check_overdue_tasks(self):
+    @timed(DB_QUERY_SECONDS, "tasks.create_tasks")
+    def create_tasks(self, tasks, user_id: int):
+        """Insert many tasks in one transaction; returns their ids in input order."""
         now = int(time.time())
-        conn = _get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute(
+        rows = [(user_id, t.title, t.description, int(t.due_date.timestamp()), now) for t in tasks]
+        if not rows:
+            return []
+        with db.connection() as conn:
+            # the write lock keeps AUTOINCREMENT ids of this batch consecutive
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
                 """
-                SELECT * FROM tasks
+                INSERT INTO tasks
+                (user_id, title, description, due_date, created_at, is_completed, is_notified)
+                VALUES (?, ?, ?, ?, ?, 0, 0)
+                """,
+                rows
+            )
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            _bump_versions(conn, [user_id])
+            conn.commit()
+        _notify_created(None, min(r[3] for r in rows))
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    @timed(DB_QUERY_SECONDS, "tasks.tasks_version")
+    def tasks_version(self, user_id: int) -> int:
+        """Changes whenever the user's task list does (one primary-key read)."""
+        with db.connection() as conn:
+            row = conn.execute("SELECT version FROM task_versions WHERE user_id = ?", (user_id,)).fetchone()
+            return row["version"] if row else 0
+
+    @timed(DB_QUERY_SECONDS, "tasks.get_tasks")
+    def get_tasks(
+        self,
+        user_id: int,
+        status: str = "all",
+        notified: Optional[bool] = None,
+        due_from: Optional[datetime] = None,
+        due_to: Optional[datetime] = None,
+        fields: Optional[Iterable[str]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Dict:
+        """One page of the user's tasks ordered by ``(due_date, id)``.
+
+        Keyset pagination: pass the returned ``next_cursor`` back to get the
+        next page; each page is an index range scan regardless of depth.
+        ``status`` is ``all`` / ``pending`` / ``completed``. ``fields``
+        projects the columns (``id`` and ``due_date`` are always included).
+        Raises ``ValueError`` for bad arguments.
+        """
+        cols = list(TASK_FIELDS) if not fields else ["id", "due_date"] + [f for f in fields if f not in ("id", "due_date")]
+        unknown = set(cols) - set(TASK_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        if status not in ("all", "pending", "completed"):
+            raise ValueError("status must be all, pending or completed")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        where, params = ["user_id = ?"], [user_id]
+        if cursor:
+            where.append("(due_date, id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if status != "all":
+            where.append("is_completed = ?")
+            params.append(1 if status == "completed" else 0)
+        if notified is not None:
+            where.append("is_notified = ?")
+            params.append(1 if notified else 0)
+        if due_from is not None:
+            where.append("due_date >= ?")
+            params.append(int(due_from.timestamp()))
+        if due_to is not None:
+            where.append("due_date <= ?")
+            params.append(int(due_to.timestamp()))
+        params.append(limit + 1)
+
+        with db.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(cols)} FROM tasks WHERE {' AND '.join(where)} ORDER BY due_date, id LIMIT ?",
+                params
+            ).fetchall()
+
+        items = []
+        for r in rows[:limit]:
+            item = {c: r[c] for c in cols}
+            item["due_date"] = datetime.fromtimestamp(r["due_date"])
+            if "created_at" in item and item["created_at"] is not None:
+                item["created_at"] = datetime.fromtimestamp(item["created_at"])
+            for flag in ("is_completed", "is_notified"):
+                if flag in item:
+                    item[flag] = bool(item[flag])
+            items.append(item)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["due_date"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    @timed(DB_QUERY_SECONDS, "tasks.upcoming_tasks")
+    def upcoming_tasks(self, user_id: int, limit: int = 5):
+        """The user's next open tasks, soonest first."""
+        with db.connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, title, description, due_date FROM tasks
+                WHERE user_id = ? AND is_completed = 0 AND due_date >= ?
+                ORDER BY due_date LIMIT ?
+                """,
+                (user_id, int(time.time()), limit),
+            ).fetchall()
+            return [
+                {"id": r["id"], "title": r["title"], "description": r["description"], "due_date": datetime.fromtimestamp(r["due_date"])}
+                for r in rows
+            ]
+
+    @timed(DB_QUERY_SECONDS, "tasks.pending_due_dates")
+    def pending_due_dates(self, until_ts: int):
+        """``(id, due_at)`` of pending reminders due up to ``until_ts``.
+
+        ``due_at`` is pushed past an active lease, i.e. when the task could
+        next be claimed.
+        """
+        with db.connection() as conn:
+            return conn.execute(
+                """
+                SELECT id, MAX(due_date, COALESCE(lease_expires + 1, 0)) AS due_at FROM tasks
                 WHERE is_completed = 0
                   AND is_notified = 0
                   AND due_date <= ?
                 """,
-                (now,)
-            )
-            rows = cur.fetchall()
+                (until_ts,)
+            ).fetchall()
 
-            # 🔥 tandai sudah dikirim
-            for r in rows:
-                cur.execute(
-                    "UPDATE tasks SET is_notified = 1 WHERE id = ?",
-                    (r["id"],)
-                )
+    @timed(DB_QUERY_SECONDS, "tasks.claim_due_tasks")
+    def claim_due_tasks(self, owner: str, lease_seconds: int = LEASE_SECONDS, limit: int = -1):
+        """Lease due, unleased (or lease-expired) reminders to ``owner``.
 
+        Each task is held by exactly one worker until it is acknowledged with
+        ``ack_tasks`` or its lease runs out (crashed worker), after which any
+        worker can claim it again. ``limit`` caps the batch (-1: no cap).
+        """
+        now = int(time.time())
+        with db.connection() as conn:
+            if sqlite3.sqlite_version_info >= (3, 35, 0):
+                rows = conn.execute(
+                    """
+                    UPDATE tasks SET lease_owner = ?, lease_expires = ?
+                    WHERE id IN (
+                        SELECT id FROM tasks
+                        WHERE is_completed = 0
+                          AND is_notified = 0
+                          AND due_date <= ?
+                          AND (lease_expires IS NULL OR lease_expires < ?)
+                        ORDER BY due_date
+                        LIMIT ?
+                    )
+                    RETURNING id, user_id, title, description, due_date
+                    """,
+                    (owner, now + lease_seconds, now, now, limit)
+                ).fetchall()
+            else:
+                # no RETURNING: claim inside one write transaction instead
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    """
+                    SELECT id, user_id, title, description, due_date FROM tasks
+                    WHERE is_completed = 0
+                      AND is_notified = 0
+                      AND due_date <= ?
+                      AND (lease_expires IS NULL OR lease_expires < ?)
+                    ORDER BY due_date
+                    LIMIT ?
+                    """,
+                    (now, now, limit)
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE tasks SET lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    [(owner, now + lease_seconds, r["id"]) for r in rows]
+                )
             conn.commit()
             return rows
-        finally:
-            conn.close()
-    
\ No newline at end of file
+
+    @timed(DB_QUERY_SECONDS, "tasks.ack_tasks")
+    def ack_tasks(self, owner: str, task_ids) -> int:
+        """Mark leased reminders as sent. Ignores tasks whose lease was lost."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        with db.connection() as conn:
+            cur = conn.executemany(
+                """
+                UPDATE tasks SET is_notified = 1, lease_owner = NULL, lease_expires = NULL
+                WHERE id = ? AND lease_owner = ?
+                """,
+                [(task_id, owner) for task_id in task_ids]
+            )
+            acked = cur.rowcount
+            conn.executemany(
+                """
+                INSERT INTO task_versions (user_id, version)
+                SELECT user_id, 1 FROM tasks WHERE id = ?
+                ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+                """,
+                [(task_id,) for task_id in task_ids]
+            )
+            # 🔥 tandai sudah dikirim
+            conn.commit()
+            return acked
+
+    @timed(DB_QUERY_SECONDS, "tasks.release_tasks")
+    def release_tasks(self, owner: str, task_ids) -> int:
+        """Give up ``owner``'s leases (failed delivery) so the tasks can be claimed again now."""
+        task_ids = list(task_ids)
+        if not task_ids:
+            return 0
+        with db.connection() as conn:
+            cur = conn.executemany(
+                """
+                UPDATE tasks SET lease_owner = NULL, lease_expires = NULL
+                WHERE id = ? AND lease_owner = ? AND is_notified = 0
+                """,
+                [(task_id, owner) for task_id in task_ids]
+            )
+            conn.commit()
+            return cur.rowcount
+
+    @timed(DB_QUERY_SECONDS, "tasks.ack_into_outbox")
+    def ack_into_outbox(self, owner: str, reminders):
+        """Ack leased tasks and append their reminders to the outbox atomically.
+
+        ``reminders`` is ``[(task_id, user_id, payload), ...]``. Only tasks
+        still leased to ``owner`` are appended, so a reminder lands in the
+        outbox exactly once. Returns ``[(user_id, payload_with_seq), ...]``.
+        """
+        queued = []
+        with db.connection() as conn:
+            for task_id, user_id, payload in reminders:
+                cur = conn.execute(
+                    """
+                    UPDATE tasks SET is_notified = 1, lease_owner = NULL, lease_expires = NULL
+                    WHERE id = ? AND lease_owner = ?
+                    """,
+                    (task_id, owner)
+                )
+                if cur.rowcount:
+                    seq = outbox_model.append(conn, user_id, payload)
+                    queued.append((user_id, dict(payload, seq=seq)))
+            _bump_versions(conn, [user_id for user_id, _ in queued])
+            conn.commit()
+        return queued
+
+    def check_overdue_tasks(self):
+        """Claim and immediately acknowledge every due reminder (single worker)."""
+        owner = f"{WORKER_ID}:oneshot"
+        rows = self.claim_due_tasks(owner)
+        self.ack_tasks(owner, [r["id"] for r in rows])
+        return rows
@@ -0,0 +1,191 @@
+"""Text-to-speech with a content-addressed, size-bounded disk cache.
+
+Audio is keyed by ``sha256(lang + text)`` and stored as
+``<TTS_CACHE_DIR>/<key[:2]>/<key>.mp3``, so the same greeting is only ever
+synthesized once and the key doubles as a strong ETag.
+
+The directory is shared by every uvicorn worker (and survives restarts), so
+the budget is enforced against the directory, not per-process state: after
+each new file the directory is re-stat'ed and the least recently served
+files (oldest mtime; serving a file touches it) are deleted until it fits
+``max_bytes``. Files served in the last ``hold`` seconds, by any worker,
+are never deleted, so a response that is still being sent keeps its file.
+Deleting a file another worker already removed is fine, and ``acquire``
+re-renders a file that disappeared before it could be served.
+
+Engines are plain objects with ``synthesize(text, lang) -> bytes``;
+``TTS_ENGINE=stub`` swaps gTTS for a local engine that needs no network.
+"""
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class TTSUnavailable(Exception):
+    pass
+
+
+class GTTSEngine:
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        try:
+            from gtts import gTTS
+        except Exception:
+            raise TTSUnavailable("gTTS library not installed on server")
+        buf = BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class StubEngine:
+    """Deterministic offline engine (not playable audio) for tests and local dev."""
+
+    name = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        self.calls += 1
+        return b"ID3\x03\x00\x00\x00\x00\x00\x00" + f"{lang}:{text}".encode("utf-8")
+
+
+def cache_key(text: str, lang: str) -> str:
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, engine, directory: str, max_bytes: int, hold: float = 60.0):
+        self.engine = engine
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hold = hold
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU order (as of the last scan)
+        self._mtimes: Dict[str, float] = {}
+        self._size = 0
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _load(self):
+        # rebuild the LRU index from disk, oldest access first; other workers write here too
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".mp3"):
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue  # evicted by another worker mid-scan
+                    entries.append((st.st_mtime, name[:-4], st.st_size))
+        self._index.clear()
+        self._mtimes.clear()
+        self._size = 0
+        for mtime, key, size in sorted(entries):
+            self._index[key] = size
+            self._mtimes[key] = mtime
+            self._size += size
+        self._loaded = True
+
+    def _touch(self, key: str):
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _add(self, key: str):
+        with self._lock:
+            # re-stat: this worker's index doesn't see what the others wrote or evicted
+            self._load()
+            if self._size <= self.max_bytes:
+                return
+            served_since = time.time() - self.hold
+            for old in list(self._index):
+                if self._size <= self.max_bytes or len(self._index) <= 1:
+                    break
+                if old == key or self._mtimes[old] > served_since:
+                    continue  # just written, or being served (possibly by another worker)
+                self._size -= self._index.pop(old)
+                del self._mtimes[old]
+                try:
+                    os.unlink(self._path(old))
+                except OSError:
+                    pass  # already gone: another worker evicted it too
+
+    def get(self, text: str, lang: str = "id") -> Tuple[str, str]:
+        """Return ``(path, key)`` of the MP3 for ``text``, synthesizing it on a miss."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._load()
+        key = cache_key(text, lang)
+        path = self._path(key)
+        if os.path.exists(path):
+            self.hits += 1
+            self._touch(key)
+            return path, key
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # another request may have synthesized it while we waited
+            if os.path.exists(path):
+                self.hits += 1
+                self._touch(key)
+                return path, key
+            self.misses += 1
+            audio = self.engine.synthesize(text, lang)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+            self._add(key)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return path, key
+
+    def acquire(self, text: str, lang: str = "id") -> Tuple[str, str, os.stat_result]:
+        """``get`` for serving: also returns the file's stat, taken after the touch.
+
+        The touch keeps the file out of eviction for ``hold`` seconds, in every
+        worker. If another worker deleted it before that, it is synthesized again.
+        """
+        while True:
+            path, key = self.get(text, lang)
+            try:
+                return path, key, os.stat(path)
+            except FileNotFoundError:
+                continue
+
+    def stats(self) -> Dict:
+        return {"engine": self.engine.name, "hits": self.hits, "misses": self.misses, "files": len(self._index), "bytes": self._size}
+
+
+def create_engine(name: Optional[str] = None):
+    name = (name or os.getenv("TTS_ENGINE", "gtts")).lower()
+    if name == "stub":
+        return StubEngine()
+    return GTTSEngine()
+
+
+tts_cache = TTSCache(
+    create_engine(),
+    directory=os.getenv("TTS_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "assistant-tts"),
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_MB", "100")) * 1024 * 1024,
+)
@@ -0,0 +1,68 @@
+"""Opt-in warm-up for dependencies that are loaded lazily.
+
+Heavy libraries (httpx, dateparser, gTTS) and pools are only imported or
+created on first use, which keeps worker boot fast. Deployments that would
+rather pay that cost before taking traffic list the hooks to run at startup
+in ``APP_WARMUP`` (comma separated, or ``all``)::
+
+    APP_WARMUP=openrouter,dateparser
+
+``OPENROUTER_WARMUP=1`` is still honoured and implies ``openrouter``.
+"""
+import os
+import time
+import asyncio
+import importlib
+from typing import Iterable, List, Optional
+
+from services import date_parser
+from services.llm_client import llm_client
+from services.password_hasher import password_hasher
+
+
+async def _openrouter():
+    await llm_client.warm_up()
+
+
+async def _dateparser():
+    await asyncio.to_thread(date_parser.dateparser_date, "besok")
+
+
+async def _tts():
+    await asyncio.to_thread(importlib.import_module, "gtts")
+
+
+async def _hasher():
+    await password_hasher.hash("warm-up", "warm-up")
+
+
+WARMUP_HOOKS = {
+    "openrouter": _openrouter,
+    "dateparser": _dateparser,
+    "tts": _tts,
+    "hasher": _hasher,
+}
+
+
+def requested_hooks() -> List[str]:
+    raw = os.getenv("APP_WARMUP", "")
+    names = [n.strip().lower() for n in raw.split(",") if n.strip()]
+    if "all" in names:
+        names = list(WARMUP_HOOKS)
+    if os.getenv("OPENROUTER_WARMUP", "").lower() in ("1", "true", "yes") and "openrouter" not in names:
+        names.append("openrouter")
+    return names
+
+
+async def warm_up(names: Optional[Iterable[str]] = None):
+    for name in requested_hooks() if names is None else names:
+        hook = WARMUP_HOOKS.get(name)
+        if hook is None:
+            print(f"[WARMUP] unknown hook: {name}")
+            continue
+        t0 = time.perf_counter()
+        try:
+            await hook()
+            print(f"[WARMUP] {name}: {(time.perf_counter() - t0) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"[WARMUP] {name} failed:", e)
@@ -0,0 +1,241 @@
+"""Minimal in-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms keyed by label values. The registry lock
+is only taken when a new label combination appears; after that every
+series has its own small lock, so recording on the hot path is one dict
+lookup plus an uncontended lock. Values that already live elsewhere (socket
+counts, cache stats) are exposed through callbacks evaluated at scrape time.
+"""
+import time
+import bisect
+import threading
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new(self):
+        raise NotImplementedError
+
+    def _get(self, labels: Tuple[str, ...]):
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, self._new())
+        return series
+
+    def labels(self, *values) -> "_Bound":
+        return _Bound(self, self._get(tuple(str(v) for v in values)))
+
+
+class _Bound:
+    __slots__ = ("metric", "series")
+
+    def __init__(self, metric, series):
+        self.metric = metric
+        self.series = series
+
+    def inc(self, amount: float = 1.0):
+        self.metric._inc(self.series, amount)
+
+    def set(self, value: float):
+        self.metric._set(self.series, value)
+
+    def observe(self, value: float):
+        self.metric._observe(self.series, value)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new(self):
+        return [0.0, threading.Lock()]
+
+    def _inc(self, series, amount):
+        with series[1]:
+            series[0] += amount
+
+    def inc(self, amount: float = 1.0):
+        self._inc(self._get(()), amount)
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v[0])}" for k, v in list(self._series.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _set(self, series, value):
+        series[0] = value
+
+    def set(self, value: float):
+        self._set(self._get(()), value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new(self):
+        # per-bucket counts (+Inf last), sum, lock
+        return [[0] * (len(self.buckets) + 1), 0.0, threading.Lock()]
+
+    def _observe(self, series, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with series[2]:
+            series[0][i] += 1
+            series[1] += value
+
+    def observe(self, value: float):
+        self._observe(self._get(()), value)
+
+    def time(self, *label_values):
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self.labels(*label_values))
+
+    def collect(self) -> List[str]:
+        out = []
+        for key, (counts, total, lock) in list(self._series.items()):
+            with lock:
+                counts, total = list(counts), total
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_fmt(bound)}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return out
+
+
+class _Timer:
+    __slots__ = ("bound", "t0")
+
+    def __init__(self, bound: _Bound):
+        self.bound = bound
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.bound.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class _Callback:
+    def __init__(self, name: str, help: str, type: str, labelnames: Sequence[str], fn: Callable[[], Iterable[Tuple[Sequence, float]]]):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def collect(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, [str(v) for v in key])} {_fmt(value)}" for key, value in self.fn()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, fn, type: str = "gauge", labelnames: Sequence[str] = ()):
+        """Expose values computed at scrape time: ``fn() -> [(label_values, value), ...]``."""
+        return self._register(_Callback(name, help, type, labelnames, fn))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.collect()
+            except Exception as e:
+                print(f"[METRICS] collecting {metric.name} failed:", e)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def timed(histogram: Histogram, *label_values):
+    """Decorator: observe the duration of every call of a sync function."""
+    def decorator(fn):
+        bound = histogram.labels(*label_values)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                bound.observe(time.perf_counter() - t0)
+        return wrapper
+    return decorator
+
+
+registry = Registry()
+
+# shared metrics, recorded by the modules they describe
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route (time to response start)", ("method", "route")
+)
+HTTP_REQUESTS = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "SQLite query/transaction time per operation", ("op",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+LLM_REQUEST_SECONDS = registry.histogram("llm_request_duration_seconds", "OpenRouter call latency", ("kind",))
+LLM_ERRORS = registry.counter("llm_errors_total", "Failed OpenRouter calls", ("kind",))
+REMINDER_LAG_SECONDS = registry.histogram(
+    "reminder_delivery_lag_seconds", "Delay from a task's due time to its reminder being sent",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 3600.0),
+)
@@ -0,0 +1,161 @@
+"""Opt-in stack-sampling profiler producing collapsed stacks per route.
+
+A background thread snapshots every thread's Python stack with
+``sys._current_frames()`` every ``PROFILER_INTERVAL_MS``. It only exists
+while something asked for samples: a profiling window (``start_window``,
+"everything for N seconds") or an in-flight request picked by the
+``PROFILER_SAMPLE_RATE`` middleware in ``main.py``. Otherwise no thread,
+no middleware and no per-request work.
+
+Samples are attributed by looking for known code objects in the stack:
+route endpoints (and functions nested in them, e.g. the SSE generator) plus
+whatever is registered with ``label`` (scheduler, token janitor, WS senders).
+The stack is cut at that frame, so each line reads ``<label>;outer;...;inner
+<count>``, ready for flamegraph.pl or speedscope. Sync routes are covered
+because their endpoint runs in a threadpool thread; async ones because the
+running coroutine chain is on the event-loop thread. Idle threads (waiting
+in select/queue/lock) are skipped; busy stacks without a known frame (work
+handed to ``asyncio.to_thread``, dependencies) go under ``(unattributed)``.
+"""
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+MAX_DEPTH = 128
+
+UNATTRIBUTED = "(unattributed)"
+_IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    def __init__(self, interval: float = PROFILER_INTERVAL_MS / 1000, sample_rate: float = PROFILER_SAMPLE_RATE):
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self._labels: Dict[object, str] = {}
+        self._stacks: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._window_until = 0.0
+        self._active_requests = 0
+        self.samples = 0
+
+    # -- attribution --------------------------------------------------------
+
+    def label(self, fn, name: str):
+        """Attribute stacks through ``fn`` (and functions defined inside it) to ``name``."""
+        code = getattr(fn, "__code__", None)
+        todo = [code] if code is not None else []
+        while todo:
+            code = todo.pop()
+            self._labels[code] = name
+            todo.extend(c for c in code.co_consts if hasattr(c, "co_code"))
+
+    def label_routes(self, routes):
+        for route in routes:
+            endpoint = getattr(route, "endpoint", None)
+            path = getattr(route, "path", None)
+            if endpoint is None or path is None:
+                continue
+            methods = getattr(route, "methods", None)
+            self.label(endpoint, f"{','.join(sorted(methods))} {path}" if methods else f"WS {path}")
+
+    # -- control ------------------------------------------------------------
+
+    def _running(self) -> bool:
+        return self._active_requests > 0 or time.monotonic() < self._window_until
+
+    def _ensure_thread(self):
+        # caller holds self._lock
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def start_window(self, seconds: float):
+        with self._lock:
+            self._window_until = max(self._window_until, time.monotonic() + seconds)
+            self._ensure_thread()
+
+    def stop(self):
+        with self._lock:
+            self._window_until = 0.0
+
+    def request_started(self):
+        with self._lock:
+            self._active_requests += 1
+            self._ensure_thread()
+
+    def request_finished(self):
+        with self._lock:
+            self._active_requests -= 1
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._running():
+                    self._thread = None
+                    return
+            self._sample(own)
+            time.sleep(self.interval)
+
+    # -- sampling -----------------------------------------------------------
+
+    def _sample(self, own: int):
+        taken = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own or os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                continue
+            names, label = [], None
+            while frame is not None and len(names) < MAX_DEPTH:
+                names.append(_frame_name(frame.f_code))
+                label = self._labels.get(frame.f_code)
+                if label is not None:
+                    break
+                frame = frame.f_back
+            names.reverse()
+            taken.append((label or UNATTRIBUTED, ";".join(names)))
+        with self._lock:
+            self.samples += 1
+            for label, stack in taken:
+                self._stacks.setdefault(label, Counter())[stack] += 1
+
+    # -- output -------------------------------------------------------------
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Collapsed stacks (``label;frames count`` per line), optionally for one label."""
+        with self._lock:
+            lines = [
+                f"{label};{stack} {count}"
+                for label, stacks in self._stacks.items() if route is None or label == route
+                for stack, count in stacks.most_common()
+            ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "window_seconds_left": round(max(0.0, self._window_until - time.monotonic()), 1),
+                "active_requests": self._active_requests,
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "samples": self.samples,
+                "routes": {label: sum(stacks.values()) for label, stacks in self._stacks.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+
+profiler = StackSampler()
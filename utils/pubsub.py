@@ -0,0 +1,267 @@
+"""Cross-process pub/sub for ``ConnectionManager``.
+
+With ``uvicorn --workers N`` each process only holds its own sockets. Every
+user-addressed (or broadcast) message is delivered locally and published to
+the other processes, which deliver it to whatever sockets they hold.
+
+Backends (``WS_PUBSUB_BACKEND``):
+
+- ``local``  -- single process, no IPC.
+- ``unix``   -- one Unix-domain datagram socket per process in
+  ``WS_PUBSUB_DIR``; publishing sends one datagram to every peer. Default
+  on POSIX. The default directory is private (0700, owned by this user)
+  and namespaced by the database path, so only workers of the same
+  deployment find each other. Envelopes larger than one datagram are sent
+  as numbered fragments and reassembled by the receiver.
+- ``sqlite`` -- messages go through the ``ws_bus`` table in ``users.db``
+  and are picked up by each process's poller. Works everywhere (Windows).
+
+Envelopes are ``{"origin": ..., "users": [ids] | None, "text": json}``; the
+message itself is serialized once by the publisher.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import stat
+import asyncio
+import hashlib
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import db
+
+Deliver = Callable[[dict], None]
+
+# payload bytes per datagram; bigger envelopes are fragmented
+MAX_DATAGRAM = 60000
+# fragments of a message that never completes are dropped after this long
+FRAGMENT_TTL = 30.0
+
+
+def _private_dir(directory: str) -> str:
+    """Create ``directory`` 0700 (or reuse ours); refuse one owned by someone else."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise RuntimeError(f"pub/sub directory {directory} is not a directory owned by this user")
+    if st.st_mode & 0o077:
+        os.chmod(directory, 0o700)
+    return directory
+
+
+def default_bus_dir() -> str:
+    # one namespace per deployment (= database) and user, so unrelated apps never cross-deliver
+    base = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    tag = hashlib.sha1(os.path.abspath(db.DB_PATH).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base, f"assistant-ws-bus-{os.getuid()}-{tag}")
+
+
+class LocalBus:
+    name = "local"
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.published = 0
+        self.received = 0
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def publish(self, users, text: str):
+        self.published += 1
+
+    async def stop(self):
+        pass
+
+
+class UnixSocketBus(LocalBus):
+    name = "unix"
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{self.origin[:8]}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # message id -> (first seen, fragments)
+        self._partial: Dict[str, Tuple[float, List[Optional[bytes]]]] = {}
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        _private_dir(self.directory)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._sock.fileno(), self._on_readable)
+        print(f"[PUBSUB] unix bus listening on {self.path}")
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM + 1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print("[PUBSUB] receive failed:", e)
+                return
+            if data[:1] == b"F":
+                data = self._reassemble(data)
+                if data is None:
+                    continue
+            try:
+                envelope = json.loads(data)
+            except ValueError:
+                print(f"[PUBSUB] dropped undecodable message ({len(data)} bytes)")
+                continue
+            self.received += 1
+            self.deliver(envelope)
+
+    def _reassemble(self, data: bytes) -> Optional[bytes]:
+        # fragment: b"F" + {"id", "part", "parts"} + b"\n" + payload slice
+        header, _, chunk = data[1:].partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            print("[PUBSUB] dropped malformed fragment")
+            return None
+        now = time.monotonic()
+        for msg_id in [m for m, (seen, _) in self._partial.items() if now - seen > FRAGMENT_TTL]:
+            print(f"[PUBSUB] dropped incomplete message {msg_id}")
+            del self._partial[msg_id]
+        _, parts = self._partial.setdefault(meta["id"], (now, [None] * meta["parts"]))
+        parts[meta["part"]] = chunk
+        if any(p is None for p in parts):
+            return None
+        del self._partial[meta["id"]]
+        return b"".join(parts)
+
+    def _datagrams(self, data: bytes) -> List[bytes]:
+        if len(data) <= MAX_DATAGRAM:
+            return [data]
+        msg_id = uuid.uuid4().hex
+        chunks = [data[i:i + MAX_DATAGRAM] for i in range(0, len(data), MAX_DATAGRAM)]
+        return [
+            b"F" + json.dumps({"id": msg_id, "part": i, "parts": len(chunks)}).encode("utf-8") + b"\n" + chunk
+            for i, chunk in enumerate(chunks)
+        ]
+
+    def _peers(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, n) for n in names if n.endswith(".sock")]
+
+    async def publish(self, users, text: str):
+        await super().publish(users, text)
+        data = json.dumps({"origin": self.origin, "users": users, "text": text}).encode("utf-8")
+        datagrams = self._datagrams(data)
+        for peer in self._peers():
+            if peer == self.path:
+                continue
+            try:
+                for datagram in datagrams:
+                    self._sock.sendto(datagram, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # peer process is gone; clean up its socket file
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                print(f"[PUBSUB] peer {peer} is backed up, message dropped")
+            except OSError as e:
+                print(f"[PUBSUB] publish to {peer} failed:", e)
+
+    async def stop(self):
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class SQLiteBus(LocalBus):
+    name = "sqlite"
+
+    def __init__(self, poll_interval: float = 0.1, retention: float = 60.0):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver):
+        await super().start(deliver)
+        self._last_id = await asyncio.to_thread(self._max_id)
+        self._task = asyncio.create_task(self._poll())
+
+    def _max_id(self) -> int:
+        with db.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM ws_bus").fetchone()[0]
+
+    def _insert(self, payload: str):
+        with db.connection() as conn:
+            conn.execute(
+                "INSERT INTO ws_bus (origin, payload, created_at) VALUES (?, ?, ?)",
+                (self.origin, payload, time.time()),
+            )
+            conn.commit()
+
+    def _fetch(self):
+        with db.connection() as conn:
+            return conn.execute(
+                "SELECT id, origin, payload FROM ws_bus WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+
+    def _purge(self):
+        with db.connection() as conn:
+            conn.execute("DELETE FROM ws_bus WHERE created_at < ?", (time.time() - self.retention,))
+            conn.commit()
+
+    async def _poll(self):
+        next_purge = time.monotonic() + self.retention
+        while True:
+            try:
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + self.retention
+                    await asyncio.to_thread(self._purge)
+                rows = await asyncio.to_thread(self._fetch)
+                for row in rows:
+                    self._last_id = row["id"]
+                    if row["origin"] == self.origin:
+                        continue
+                    self.received += 1
+                    self.deliver(json.loads(row["payload"]))
+            except Exception as e:
+                print("[PUBSUB] poll failed:", e)
+            await asyncio.sleep(self.poll_interval)
+
+    async def publish(self, users, text: str):
+        await super().publish(users, text)
+        payload = json.dumps({"origin": self.origin, "users": users, "text": text})
+        await asyncio.to_thread(self._insert, payload)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def create_bus(backend: Optional[str] = None) -> LocalBus:
+    default = "unix" if hasattr(socket, "AF_UNIX") and os.name == "posix" else "sqlite"
+    backend = (backend or os.getenv("WS_PUBSUB_BACKEND") or default).lower()
+    if backend == "unix":
+        directory = os.getenv("WS_PUBSUB_DIR") or default_bus_dir()
+        return UnixSocketBus(directory)
+    if backend == "sqlite":
+        return SQLiteBus(poll_interval=float(os.getenv("WS_PUBSUB_POLL_INTERVAL", "0.1")))
+    return LocalBus()
@@ -0,0 +1,117 @@
+"""Per-request timing spans, reported as a ``Server-Timing`` header.
+
+The HTTP middleware in ``main.py`` opens a ``Trace`` for every request and
+stores it in a context variable; code along the request path wraps its
+stages in ``with span("name"):``. The context is copied into
+``run_in_threadpool``/``asyncio.to_thread`` calls and sync dependencies, so
+spans work there too. Outside a request ``span`` is a no-op.
+
+Spans with the same name are summed in the header (``llm;dur=812.4``). A
+``TRACE_SAMPLE_RATE`` fraction of requests is also appended as one JSON line
+to ``TRACE_FILE`` (after the body has been sent, so streamed responses get
+their full duration) for offline analysis.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") not in ("0", "false", "no")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    __slots__ = ("method", "path", "sampled", "started", "t0", "spans")
+
+    def __init__(self, method: str, path: str, sampled: bool = False):
+        self.method = method
+        self.path = path
+        self.sampled = sampled
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        # (name, start offset, duration) in seconds; list.append is thread-safe
+        self.spans: List[tuple] = []
+
+    def add(self, name: str, start: float, seconds: float):
+        self.spans.append((name, start - self.t0, seconds))
+
+    def totals(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        for name, _, seconds in self.spans:
+            out[name] = out.get(name, 0.0) + seconds
+        return out
+
+    def header(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.totals().items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.t0) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_json(self, route: str, status: int) -> str:
+        return json.dumps({
+            "ts": self.started,
+            "method": self.method,
+            "route": route,
+            "path": self.path,
+            "status": status,
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+            "spans": [
+                {"name": name, "start_ms": round(start * 1000, 3), "dur_ms": round(seconds * 1000, 3)}
+                for name, start, seconds in self.spans
+            ],
+        })
+
+
+def start_trace(method: str, path: str) -> Trace:
+    trace = Trace(method, path, sampled=TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE)
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time the block into the current request's trace (no-op without one)."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, t0, time.perf_counter() - t0)
+
+
+def record(name: str, seconds: float):
+    """Add a duration measured elsewhere (e.g. time to first streamed chunk)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, time.perf_counter() - seconds, seconds)
+
+
+def write_trace(trace: Trace, route: str, status: int):
+    line = trace.to_json(route, status)
+    try:
+        with _write_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print("[TRACE] write failed:", e)
+
+
+async def write_after_body(body_iterator, trace: Trace, route: str, status: int):
+    """Pass a response body through, then write the sampled trace."""
+    async for chunk in body_iterator:
+        yield chunk
+    await asyncio.to_thread(write_trace, trace, route, status)
@@ -1,22 +1,178 @@
+import os
+import json
+import asyncio
 from fastapi import WebSocket
-from typing import Dict
+from typing import Dict, Iterable, Optional, Set
+
+from utils.pubsub import LocalBus
+
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "256"))
+# what to do when a client's outbound queue is full: "drop_oldest" | "disconnect"
+WS_OVERFLOW = os.getenv("WS_OVERFLOW", "drop_oldest")
+
+
+class Connection:
+    """One socket with its own bounded outbound queue and sender task.
+
+    Producers only ever ``enqueue`` (never await the socket), so a slow
+    client can't block the caller; it just fills up its own queue.
+
+    Outbox replay bypasses the queue and its overflow policy: it holds
+    ``send_lock`` (pausing the sender task) and awaits the socket directly.
+    Live messages that overflow meanwhile are not dropped under the policy
+    but only flagged in ``missed``; they are in the outbox, so the replay
+    just reads again.
+    """
+
+    def __init__(self, manager: "ConnectionManager", user_id: int, websocket: WebSocket, max_queue: int, overflow: str):
+        self.manager = manager
+        self.user_id = user_id
+        self.websocket = websocket
+        self.overflow = overflow
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+        self.send_lock = asyncio.Lock()
+        self.replaying = False
+        self.missed = False
+        self._sender = asyncio.create_task(self._run())
+
+    def enqueue(self, text: str) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self.replaying:
+            self.missed = True
+            return True
+        if self.overflow == "disconnect":
+            print(f"[WS] User {self.user_id} too slow, disconnecting")
+            self.close(code=1013)
+            return False
+        # drop_oldest
+        try:
+            self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        self.dropped += 1
+        self.queue.put_nowait(text)
+        return True
+
+    async def send_json(self, message: dict) -> bool:
+        return self.enqueue(json.dumps(message, default=str))
+
+    async def _run(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                async with self.send_lock:
+                    await self.websocket.send_text(text)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[WS] send to user {self.user_id} failed:", e)
+        finally:
+            self.closed = True
+            self.manager._remove(self)
+
+    def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        self._sender.cancel()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, WebSocket] = {}
+    """Sockets held by this process, plus an optional cross-process bus.
 
-    async def connect(self, user_id: int, websocket: WebSocket):
+    When a bus is attached (``start_pubsub``), every ``send_*``/``broadcast``
+    is delivered locally and published so other workers deliver it to the
+    sockets they hold. Return values only count local sockets.
+    """
+
+    def __init__(self, max_queue: int = WS_QUEUE_SIZE, overflow: str = WS_OVERFLOW):
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.active_connections: Dict[int, Set[Connection]] = {}
+        self.bus: Optional[LocalBus] = None
+
+    async def start_pubsub(self, bus: LocalBus):
+        await bus.start(self._deliver_local)
+        self.bus = bus
+
+    async def stop_pubsub(self):
+        if self.bus is not None:
+            await self.bus.stop()
+            self.bus = None
+
+    def _deliver_local(self, envelope: dict) -> int:
+        text = envelope["text"]
+        users = envelope.get("users")
+        if users is None:
+            return sum(self._fanout(conns, text) for conns in list(self.active_connections.values()))
+        sent = 0
+        for user_id in users:
+            conns = self.active_connections.get(user_id)
+            if conns:
+                sent += self._fanout(conns, text)
+        return sent
+
+    async def _publish(self, users, text: str) -> int:
+        sent = self._deliver_local({"users": users, "text": text})
+        if self.bus is not None:
+            await self.bus.publish(users, text)
+        return sent
+
+    async def connect(self, user_id: int, websocket: WebSocket) -> Connection:
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        print(f"[WS] User {user_id} connected")
+        conn = Connection(self, user_id, websocket, self.max_queue, self.overflow)
+        self.active_connections.setdefault(user_id, set()).add(conn)
+        print(f"[WS] User {user_id} connected ({len(self.active_connections[user_id])} sockets)")
+        return conn
+
+    def disconnect(self, conn: Connection):
+        conn.closed = True
+        conn._sender.cancel()
+        self._remove(conn)
+        print(f"[WS] User {conn.user_id} disconnected")
+
+    def _remove(self, conn: Connection):
+        conns = self.active_connections.get(conn.user_id)
+        if conns is None:
+            return
+        conns.discard(conn)
+        if not conns:
+            del self.active_connections[conn.user_id]
+
+    def is_connected(self, user_id: int) -> bool:
+        return bool(self.active_connections.get(user_id))
+
+    def connection_count(self) -> int:
+        return sum(len(c) for c in self.active_connections.values())
+
+    def _fanout(self, conns: Iterable[Connection], text: str) -> int:
+        return sum(1 for conn in list(conns) if conn.enqueue(text))
+
+    async def send_to_user(self, user_id: int, message: dict) -> int:
+        """Deliver ``message`` to every socket of ``user_id`` on any worker."""
+        return await self._publish([user_id], json.dumps(message, default=str))
+
+    async def send_to_users(self, user_ids: Iterable[int], message: dict) -> int:
+        """Multicast: serialize once, deliver to every socket of every user."""
+        return await self._publish(list(user_ids), json.dumps(message, default=str))
 
-    def disconnect(self, user_id: int):
-        self.active_connections.pop(user_id, None)
-        print(f"[WS] User {user_id} disconnected")
+    async def broadcast(self, message: dict) -> int:
+        return await self._publish(None, json.dumps(message, default=str))
 
-    async def send_to_user(self, user_id: int, message: dict):
-        ws = self.active_connections.get(user_id)
-        if ws:
-            await ws.send_json(message)
 
 manager = ConnectionManager()